@@ -1,13 +1,15 @@
-import pandas as pd
+from tgran_catalog import DEFAULT_TEMPLATE, generate_catalog
 
-def generate_csv(ip_address, filename):
-    data = {"URL": [f"http://{ip_address}/index{i}.html" for i in range(1, 101)]}
-    df = pd.DataFrame(data)
-    df.to_csv(filename, index_label="Index")
-    print(f"File '{filename}' berhasil dibuat dengan IP: {ip_address}")
+def generate_csv(ip_address, filename, count=100, template=DEFAULT_TEMPLATE, size_spec='fixed:2000'):
+    # Ditulis per chunk, jadi jutaan URL pun tidak perlu ditampung di memori
+    count = generate_catalog(filename, count, [template], ip=ip_address, size_spec=size_spec)
+    print(f"File '{filename}' berhasil dibuat dengan IP: {ip_address} ({count} URL)")
 
 # Input dari user
 ip_user = input("Input IP: ")
-csv_name = input("CSV File Name (with .csv): ")
+csv_name = input("File Name (.csv, atau .tgc untuk catalog besar): ")
+url_count = int(input("Jumlah URL [100]: ") or 100)
+url_template = input(f"Template URL ({{ip}}, {{n}}, {{i}}, {{size}}) [{DEFAULT_TEMPLATE}]: ").strip() or DEFAULT_TEMPLATE
+sizes = input("Ukuran objek (fixed:N / lognormal:MEDIAN,SIGMA / pareto:MIN,ALPHA) [fixed:2000]: ").strip() or "fixed:2000"
 
-generate_csv(ip_user, csv_name)
+generate_csv(ip_user, csv_name, url_count, url_template, sizes)
@@ -5,9 +5,15 @@ import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urljoin
 import re
+import codecs
+from tgran_assets import IncrementalLinkScanner
+from tgran_stream import BodyReader
 
 USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_12_3) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/56.0.2924.87 Safari/537.36'
 
+# Ukuran asset dihitung tanpa menyimpan body-nya
+BODY_READER = BodyReader()
+
 class SourceIPAdapter(HTTPAdapter):
     def __init__(self, source_address, **kwargs):
         self.source_address = source_address
@@ -30,31 +36,52 @@ def extract_links(html, base_url):
 
 def fetch_url(session, url):
     try:
-        response = session.get(url, timeout=5)
-        return len(response.content), response.status_code
+        response = session.get(url, timeout=5, stream=True)
+        return BODY_READER.consume(response), response.status_code
     except requests.exceptions.RequestException:
         return 0, None
 
-def measure_performance_once(session, url):
+def measure_performance_once(session, url, streaming=False):
     try:
         start_rtt = time.time()
-        response = session.get(url, timeout=5)
-        rtt = (time.time() - start_rtt) * 1000
+        response = session.get(url, timeout=5, stream=streaming)
+        ttfb = response.elapsed.total_seconds() * 1000
         status_code = response.status_code
     except requests.exceptions.RequestException as e:
         print(f"💥 Error request: {e}")
         return None
 
-    links = extract_links(response.text, url)
-    total_size = len(response.content)
-
-    start_fetch = time.time()
     with ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_url = {executor.submit(fetch_url, session, link): link for link in links}
-        for future in as_completed(future_to_url):
+        futures = []
+        if streaming:
+            # Fetch asset dimulai begitu link terbaca, selagi HTML masih diterima
+            scanner = IncrementalLinkScanner(url, lambda link: futures.append(executor.submit(fetch_url, session, link)))
+            decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+            total_size = 0
+            try:
+                for chunk in response.iter_content(16 * 1024):
+                    total_size += len(chunk)
+                    scanner.feed(decoder.decode(chunk))
+            except requests.exceptions.RequestException as e:
+                print(f"💥 Error request: {e}")
+                return None
+            scanner.feed(decoder.decode(b'', final=True))
+            scanner.close()
+            html_done = time.time()
+            rtt = (html_done - start_rtt) * 1000
+        else:
+            html_done = time.time()
+            rtt = (html_done - start_rtt) * 1000
+            links = extract_links(response.text, url)
+            total_size = len(response.content)
+            futures = [executor.submit(fetch_url, session, link) for link in links]
+
+        start_fetch = time.time()
+        for future in as_completed(futures):
             size, _ = future.result()
             total_size += size
     fetch_time = time.time() - start_fetch
+    assets_done = time.time()
 
     throughput = (total_size / 1024) / fetch_time if fetch_time > 0 else 0
     latency = fetch_time * 1000
@@ -64,10 +91,13 @@ def measure_performance_once(session, url):
         'total_size_kb': total_size / 1024,
         'throughput_kbps': throughput,
         'latency_ms': latency,
-        'status_code': status_code
+        'status_code': status_code,
+        'ttfb_ms': ttfb,
+        'html_done_ms': (html_done - start_rtt) * 1000,
+        'assets_done_ms': (assets_done - start_rtt) * 1000
     }
 
-def measure_multiple_requests(url, source_ip, num_requests=10):
+def measure_multiple_requests(url, source_ip, num_requests=10, streaming=False):
     session = requests.Session()
     session.mount('http://', SourceIPAdapter(source_ip))
     session.mount('https://', SourceIPAdapter(source_ip))
@@ -75,7 +105,7 @@ def measure_multiple_requests(url, source_ip, num_requests=10):
 
     results = []
     with ThreadPoolExecutor(max_workers=num_requests) as executor:
-        futures = [executor.submit(measure_performance_once, session, url) for _ in range(num_requests)]
+        futures = [executor.submit(measure_performance_once, session, url, streaming) for _ in range(num_requests)]
         for future in as_completed(futures):
             result = future.result()
             if result:
@@ -85,12 +115,16 @@ def measure_multiple_requests(url, source_ip, num_requests=10):
     avg_size = sum(r['total_size_kb'] for r in results) / len(results)
     avg_throughput = sum(r['throughput_kbps'] for r in results) / len(results)
     avg_latency = sum(r['latency_ms'] for r in results) / len(results)
+    avg_ttfb = sum(r['ttfb_ms'] for r in results) / len(results)
+    avg_html_done = sum(r['html_done_ms'] for r in results) / len(results)
+    avg_assets_done = sum(r['assets_done_ms'] for r in results) / len(results)
 
     print(f"\n🔥 Total Request: {len(results)}")
     print(f"⚡ Rata-rata RTT: {avg_rtt:.2f} ms")
     print(f"📦 Rata-rata Size: {avg_size:.2f} KB")
     print(f"🚀 Rata-rata Throughput: {avg_throughput:.2f} KB/s")
     print(f"⏱️ Rata-rata Latency: {avg_latency:.2f} ms")
+    print(f"🕒 Rata-rata TTFB: {avg_ttfb:.2f} ms | HTML selesai: {avg_html_done:.2f} ms | Asset selesai: {avg_assets_done:.2f} ms")
 
 if __name__ == "__main__":
     url = 'http://testasp.vulnweb.com/'
@@ -2,6 +2,37 @@ import socket
 import time
 import random
 import string
+import os
+import errno
+import ctypes
+import select
+import struct
+import queue
+import threading
+import multiprocessing as mp
+import numpy as np
+from tgran_stats import LatencyHistogram
+
+libc = ctypes.CDLL("libc.so.6", use_errno=True)
+
+class iovec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+
+class msghdr(ctypes.Structure):
+    _fields_ = [('msg_name', ctypes.c_void_p), ('msg_namelen', ctypes.c_uint32),
+                ('msg_iov', ctypes.POINTER(iovec)), ('msg_iovlen', ctypes.c_size_t),
+                ('msg_control', ctypes.c_void_p), ('msg_controllen', ctypes.c_size_t),
+                ('msg_flags', ctypes.c_int)]
+
+class mmsghdr(ctypes.Structure):
+    _fields_ = [('msg_hdr', msghdr), ('msg_len', ctypes.c_uint)]
+
+MSG_DONTWAIT = 0x40
+
+# Header di awal setiap payload: stream id (sender), sequence number, waktu kirim (ns)
+PROBE_HEADER = struct.Struct('!IQQ')
+PROBE_DTYPE = np.dtype([('stream', '>u4'), ('seq', '>u8'), ('sent_ns', '>u8')])  # layout sama dengan PROBE_HEADER
+RESULT_GRACE = 5.0  # detik tambahan menunggu histogram RTT dari sender
 
 def generate_random_payload(size):
     """Generate random payload of given size in bytes."""
@@ -48,6 +79,400 @@ def send_udp_packets(target_ip, target_port, packet_size=512, packet_count=1000,
     print(f"\n✅ Sent {sent} packets in {elapsed:.2f} seconds.")
     print(f"📊 Throughput: {((sent * packet_size) / 1024) / elapsed:.2f} KB/s")
 
+class BatchSender:
+    """
+    Sends batches of preallocated datagrams on a connected UDP socket.
+
+    All payloads live in one bytearray that is allocated once; ``slot(i)`` returns a
+    writable memoryview of packet ``i``. Batches go out with a single sendmmsg() call
+    when libc provides it, otherwise with one send() per packet.
+
+    :param sock: Connected UDP socket
+    :param packet_size: Size of each datagram in bytes
+    :param batch_size: Number of datagrams per batch
+    """
+
+    def __init__(self, sock, packet_size, batch_size):
+        self.sock = sock
+        self.packet_size = packet_size
+        self.batch_size = batch_size
+        self.buffer = bytearray(os.urandom(packet_size * batch_size))
+        self.view = memoryview(self.buffer)
+        self._sendmmsg = getattr(libc, 'sendmmsg', None)
+
+        self._raw = (ctypes.c_char * len(self.buffer)).from_buffer(self.buffer)
+        base = ctypes.addressof(self._raw)
+        self._iov = (iovec * batch_size)()
+        self._msgs = (mmsghdr * batch_size)()
+        for i in range(batch_size):
+            self._iov[i].iov_base = base + i * packet_size
+            self._iov[i].iov_len = packet_size
+            self._msgs[i].msg_hdr.msg_iov = ctypes.pointer(self._iov[i])
+            self._msgs[i].msg_hdr.msg_iovlen = 1
+
+    def slot(self, i):
+        return self.view[i * self.packet_size:(i + 1) * self.packet_size]
+
+    def headers(self):
+        """Numpy view of the PROBE_HEADER at the start of every slot, for stamping a whole batch at once."""
+        return np.ndarray((self.batch_size,), dtype=PROBE_DTYPE, buffer=self.buffer, strides=(self.packet_size,))
+
+    def send(self, count):
+        """Sends the first ``count`` slots and returns ``(sent, errors)``."""
+        if self._sendmmsg is None:
+            sent = errors = 0
+            for i in range(count):
+                try:
+                    self.sock.send(self.slot(i))
+                    sent += 1
+                except OSError:
+                    errors += 1
+            return sent, errors
+
+        done = errors = 0
+        while done < count:
+            n = self._sendmmsg(self.sock.fileno(), ctypes.byref(self._msgs, done * ctypes.sizeof(mmsghdr)),
+                               count - done, 0)
+            if n < 0:
+                err = ctypes.get_errno()
+                if err == errno.EINTR:
+                    continue
+                # Paket yang gagal (ENOBUFS, ECONNREFUSED, ...) dihitung sebagai error, batch dilanjutkan
+                errors += 1
+                done += 1
+                continue
+            done += n
+        return done - errors, errors
+
+class TokenBucket:
+    """Token bucket pacing: ``reserve(n)`` returns how long to sleep before sending ``n`` packets."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = self.burst
+        self.last = time.perf_counter()
+
+    def reserve(self, n):
+        now = time.perf_counter()
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        self.tokens -= n
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+def _collect_echoes(sock, rtt, stop):
+    # Mode reflector: paket yang dipantulkan balik dipakai untuk menghitung RTT
+    # poll() + MSG_DONTWAIT, bukan settimeout(): socket ini juga dipakai sendmmsg dan harus tetap blocking
+    buffer = bytearray(65536)
+    poller = select.poll()
+    poller.register(sock.fileno(), select.POLLIN)
+    while not stop.is_set():
+        if not poller.poll(200):
+            continue
+        try:
+            n = sock.recv_into(buffer, 0, MSG_DONTWAIT)
+        except OSError:
+            continue
+        if n >= PROBE_HEADER.size:
+            _, _, sent_ns = PROBE_HEADER.unpack_from(buffer)
+            rtt.record((time.time_ns() - sent_ns) / 1e6)
+
+def _udp_sender(index, counters, results, target_ip, target_port, source_ip, packet_size, batch_size, pps, duration,
+                packet_count, stamp, reflect):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4 * 1024 * 1024)
+    if source_ip:
+        sock.bind((source_ip, 0))
+    sock.connect((target_ip, target_port))
+
+    sender = BatchSender(sock, packet_size, batch_size)
+    bucket = TokenBucket(pps, batch_size) if pps else None
+    deadline = time.perf_counter() + duration if duration else None
+    remaining = packet_count
+    seq = 0
+    if stamp:
+        headers = sender.headers()
+        headers['stream'] = index
+        offsets = np.arange(batch_size, dtype=np.uint64)
+
+    rtt = LatencyHistogram()
+    stop = threading.Event()
+    if reflect:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        echo_thread = threading.Thread(target=_collect_echoes, args=(sock, rtt, stop), daemon=True)
+        echo_thread.start()
+
+    while remaining is None or remaining > 0:
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        n = batch_size if remaining is None else min(batch_size, remaining)
+        if bucket is not None:
+            wait = bucket.reserve(n)
+            if wait > 0:
+                time.sleep(wait)
+        if stamp:
+            # Satu operasi numpy per batch, bukan pack_into per paket
+            headers['seq'][:n] = offsets[:n] + seq
+            headers['sent_ns'][:n] = time.time_ns()
+            seq += n
+        sent, errors = sender.send(n)
+        counters[index * 3] += sent
+        counters[index * 3 + 1] += sent * packet_size
+        counters[index * 3 + 2] += errors
+        if remaining is not None:
+            remaining -= n
+
+    if reflect:
+        time.sleep(1.0)  # tunggu echo terakhir
+        stop.set()
+        echo_thread.join()
+        results.put(rtt)
+    sock.close()
+
+def run_udp_engine(target_ip, target_port, packet_size=512, num_senders=1, rate_mbps=None, rate_pps=None,
+                   duration=10, packet_count=None, batch_size=64, source_ips=None, report_interval=1.0,
+                   stamp=True, reflect=False):
+    """
+    High-rate UDP sender: several processes, each with its own socket, sending
+    sendmmsg() batches from preallocated buffers under token-bucket pacing.
+
+    :param target_ip: Target destination IP
+    :param target_port: Target destination port
+    :param packet_size: Size of each UDP packet in bytes
+    :param num_senders: Number of sender processes/sockets
+    :param rate_mbps: Optional total target rate in Mbit/s (UDP payload)
+    :param rate_pps: Optional total target rate in packets per second (ignored if rate_mbps is set)
+    :param duration: Run time in seconds (None = until packet_count is sent)
+    :param packet_count: Optional total number of packets
+    :param batch_size: Packets per sendmmsg() call
+    :param source_ips: Optional source IPs, assigned to senders round-robin
+    :param report_interval: Seconds between progress lines
+    :param stamp: Embed stream id, sequence number and send time (PROBE_HEADER) in every packet
+    :param reflect: Target is run_udp_receiver(reflect=True); measure round-trip time of the echoes
+    """
+    if stamp and packet_size < PROBE_HEADER.size:
+        raise ValueError(f"packet_size minimal {PROBE_HEADER.size} byte untuk header sequence/timestamp")
+    if rate_mbps:
+        rate_pps = rate_mbps * 1e6 / 8 / packet_size
+    pps = rate_pps / num_senders if rate_pps else None
+    counts = [None] * num_senders
+    if packet_count is not None:
+        counts = [packet_count // num_senders + (1 if i < packet_count % num_senders else 0) for i in range(num_senders)]
+
+    counters = mp.Array('q', num_senders * 3, lock=False)
+    results = mp.Queue()
+    workers = []
+    for i in range(num_senders):
+        source_ip = source_ips[i % len(source_ips)] if source_ips else None
+        worker = mp.Process(target=_udp_sender, args=(i, counters, results, target_ip, target_port, source_ip, packet_size,
+                                                      batch_size, pps, duration, counts[i], stamp, reflect), daemon=True)
+        worker.start()
+        workers.append(worker)
+
+    print(f"🚀 {num_senders} sender, {packet_size} byte/paket ke {target_ip}:{target_port}"
+          + (f", target {rate_pps:.0f} pps" if rate_pps else ", tanpa batas rate"))
+    start_time = time.time()
+    next_report = start_time + report_interval
+    previous = [0, 0, 0]
+    rtt = LatencyHistogram()
+    received = 0
+    while any(w.is_alive() for w in workers):
+        # Histogram diambil selagi jalan, supaya sender tidak tertahan di pipe queue yang penuh saat exit
+        while reflect and received < num_senders:
+            try:
+                rtt.merge(results.get_nowait())
+                received += 1
+            except queue.Empty:
+                break
+        time.sleep(min(0.05, max(0.0, next_report - time.time())))
+        if time.time() >= next_report:
+            totals = [sum(counters[i * 3 + k] for i in range(num_senders)) for k in range(3)]
+            delta = [t - p for t, p in zip(totals, previous)]
+            previous = totals
+            print(f"📈 {time.time() - start_time:6.1f} s | {delta[0] / report_interval:,.0f} pps "
+                  f"| {delta[1] * 8 / report_interval / 1e6:.2f} Mbps | errors: {delta[2]}")
+            next_report += report_interval
+    elapsed = time.time() - start_time
+    for worker in workers:
+        worker.join()
+    if reflect:
+        # Sender yang crash tidak pernah mengirim histogram; jangan ditunggu selamanya
+        crashed = [i for i, worker in enumerate(workers) if worker.exitcode != 0]
+        for i in crashed:
+            print(f"⚠️ Sender {i} berhenti dengan exitcode {workers[i].exitcode}, RTT-nya tidak dihitung")
+        while received < num_senders - len(crashed):
+            try:
+                rtt.merge(results.get(timeout=(duration or 0) + RESULT_GRACE))
+                received += 1
+            except queue.Empty:
+                print(f"⚠️ Histogram RTT hanya diterima dari {received}/{num_senders} sender")
+                break
+
+    packets, sent_bytes, errors = [sum(counters[i * 3 + k] for i in range(num_senders)) for k in range(3)]
+    print(f"\n✅ Sent {packets} packets in {elapsed:.2f} seconds ({errors} send errors).")
+    print(f"📊 Throughput: {packets / elapsed:,.0f} pps, {sent_bytes * 8 / elapsed / 1e6:.2f} Mbps")
+    summary = {'packets': packets, 'bytes': sent_bytes, 'errors': errors, 'elapsed': elapsed}
+    if reflect:
+        r = rtt.summary()
+        print(f"🔁 Echo diterima: {r['count']}/{packets} | RTT p50: {r['p50']:.3f} ms | p99: {r['p99']:.3f} ms "
+              f"| max: {r['max']:.3f} ms")
+        summary['rtt'] = r
+    return summary
+
+class UdpStreamStats:
+    """
+    Constant-memory receive statistics for one sequenced UDP stream.
+
+    Duplicates are detected within a sliding window of ``window`` sequence numbers
+    (a bitmap), older stragglers are counted as reordered. Jitter follows RFC 3550
+    (J += (|D| - J) / 16 over transit-time differences); one-way delay assumes the
+    sender and receiver clocks are synchronised (always true on loopback).
+    """
+
+    def __init__(self, window=1 << 16):
+        self.window = window
+        self.seen = bytearray(window)
+        self.first_seq = None
+        self.highest = -1
+        self.received = 0
+        self.bytes = 0
+        self.duplicates = 0
+        self.reordered = 0
+        self.jitter_ms = 0.0
+        self.last_transit = None
+        self.delay = LatencyHistogram()
+
+    def record(self, seq, sent_ns, recv_ns, size):
+        if self.first_seq is None:
+            self.first_seq = seq
+            self.highest = seq - 1
+        if seq > self.highest:
+            # Bersihkan slot bitmap untuk sequence yang baru dilewati
+            if seq - self.highest >= self.window:
+                self.seen = bytearray(self.window)
+            else:
+                for s in range(self.highest + 1, seq):
+                    self.seen[s % self.window] = 0
+            self.highest = seq
+        elif seq <= self.highest - self.window:
+            self.reordered += 1
+        elif self.seen[seq % self.window]:
+            self.duplicates += 1
+            return
+        else:
+            self.reordered += 1
+        self.seen[seq % self.window] = 1
+        self.received += 1
+        self.bytes += size
+
+        transit_ms = (recv_ns - sent_ns) / 1e6
+        if self.last_transit is not None:
+            self.jitter_ms += (abs(transit_ms - self.last_transit) - self.jitter_ms) / 16
+        self.last_transit = transit_ms
+        self.delay.record(max(transit_ms, 0.0))
+
+    def lost(self):
+        if self.first_seq is None:
+            return 0
+        return max(0, self.highest - self.first_seq + 1 - self.received)
+
+    def summary(self):
+        expected = self.highest - self.first_seq + 1 if self.first_seq is not None else 0
+        d = self.delay.summary()
+        return {
+            'received': self.received, 'bytes': self.bytes, 'lost': self.lost(),
+            'loss_pct': self.lost() / expected * 100 if expected else 0.0,
+            'duplicates': self.duplicates, 'reordered': self.reordered, 'jitter_ms': self.jitter_ms,
+            'delay_p50_ms': d['p50'], 'delay_p99_ms': d['p99'], 'delay_max_ms': d['max'],
+        }
+
+def run_udp_receiver(bind_ip="0.0.0.0", bind_port=9999, reflect=False, duration=None, batch_size=64,
+                     max_packet=2048, report_interval=1.0):
+    """
+    UDP sink/reflector for packets sent with run_udp_engine(stamp=True).
+
+    Packets are pulled in batches with recvmmsg() into preallocated buffers; with
+    ``reflect`` the same batch is echoed back to its senders with sendmmsg(). Loss,
+    reordering, duplicates, jitter and one-way delay are kept per sender stream.
+
+    :param bind_ip: Local IP to listen on
+    :param bind_port: Local UDP port
+    :param reflect: Echo every packet back to its sender (for RTT measurement)
+    :param duration: Stop after this many seconds (None = until Ctrl+C)
+    :param batch_size: Datagrams per recvmmsg() call
+    :param max_packet: Receive buffer per datagram
+    :param report_interval: Seconds between progress lines
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 16 * 1024 * 1024)
+    sock.bind((bind_ip, bind_port))
+    fd = sock.fileno()
+
+    buffer = bytearray(batch_size * max_packet)
+    raw = (ctypes.c_char * len(buffer)).from_buffer(buffer)
+    names = (ctypes.c_char * (128 * batch_size))()
+    iov = (iovec * batch_size)()
+    msgs = (mmsghdr * batch_size)()
+    for i in range(batch_size):
+        iov[i].iov_base = ctypes.addressof(raw) + i * max_packet
+        msgs[i].msg_hdr.msg_iov = ctypes.pointer(iov[i])
+        msgs[i].msg_hdr.msg_iovlen = 1
+        msgs[i].msg_hdr.msg_name = ctypes.addressof(names) + i * 128
+
+    streams = {}
+    poller = select.poll()
+    poller.register(fd, select.POLLIN)
+    print(f"👂 {'Reflector' if reflect else 'Receiver'} UDP di {bind_ip}:{bind_port}")
+
+    start_time = time.time()
+    next_report = start_time + report_interval
+    previous_packets = 0
+    try:
+        while duration is None or time.time() - start_time < duration:
+            if poller.poll(100):
+                for i in range(batch_size):
+                    iov[i].iov_len = max_packet
+                    msgs[i].msg_hdr.msg_namelen = 128
+                n = libc.recvmmsg(fd, msgs, batch_size, MSG_DONTWAIT, None)
+                recv_ns = time.time_ns()
+                if n > 0:
+                    for i in range(n):
+                        size = msgs[i].msg_len
+                        if size >= PROBE_HEADER.size:
+                            stream_id, seq, sent_ns = PROBE_HEADER.unpack_from(buffer, i * max_packet)
+                            key = (stream_id, names[i * 128:i * 128 + 8])
+                            stats = streams.get(key)
+                            if stats is None:
+                                stats = streams[key] = UdpStreamStats()
+                            stats.record(seq, sent_ns, recv_ns, size)
+                        iov[i].iov_len = size
+                    if reflect:
+                        libc.sendmmsg(fd, msgs, n, MSG_DONTWAIT)
+
+            now = time.time()
+            if now >= next_report:
+                received = sum(st.received for st in streams.values())
+                lost = sum(st.lost() for st in streams.values())
+                jitter = max((st.jitter_ms for st in streams.values()), default=0.0)
+                print(f"📥 {now - start_time:6.1f} s | {(received - previous_packets) / report_interval:,.0f} pps "
+                      f"| diterima: {received} | hilang: {lost} | jitter: {jitter:.3f} ms")
+                previous_packets = received
+                next_report += report_interval
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+
+    print("\n===== Statistik per stream =====")
+    print("Stream\tDiterima\tHilang\tLoss (%)\tDuplikat\tReorder\tJitter (ms)\tDelay p50\tDelay p99\tDelay max")
+    summaries = {}
+    for (stream_id, _), stats in streams.items():
+        r = stats.summary()
+        summaries[stream_id] = r
+        print(f"{stream_id}\t{r['received']}\t{r['lost']}\t{r['loss_pct']:.3f}\t{r['duplicates']}\t{r['reordered']}"
+              f"\t{r['jitter_ms']:.3f}\t{r['delay_p50_ms']:.3f}\t{r['delay_p99_ms']:.3f}\t{r['delay_max_ms']:.3f}")
+    return summaries
+
 if __name__ == "__main__":
     # === Konfigurasi ===
     target_ip = "192.168.1.100"     # Ganti dengan IP tujuan
@@ -56,13 +481,37 @@ if __name__ == "__main__":
     packet_count = 1000             # Jumlah paket
     delay_between_packets = 0       # Delay antar paket (0 = kirim secepatnya)
     source_ip = "192.168.1.50"      # IP lokal (interface) yang digunakan sebagai sumber
+    use_batch_engine = False        # True = engine sendmmsg multi-proses di bawah
+    num_senders = 4                 # Jumlah proses/socket pengirim
+    rate_mbps = 100                 # Target rate total (Mbps), None = secepatnya
+    duration = 10                   # Lama pengiriman (detik)
+    mode = "send"                   # send = kirim, receive = sink di port lokal, reflect = sink yang memantulkan paket
+    reflect = False                 # send + reflect: target adalah reflector, ukur RTT dari echo
 
     # Jalankan fungsi
-    send_udp_packets(
-        target_ip=target_ip,
-        target_port=target_port,
-        packet_size=packet_size,
-        packet_count=packet_count,
-        delay=delay_between_packets,
-        source_ip=source_ip
-    )
+    if mode in ("receive", "reflect"):
+        run_udp_receiver(
+            bind_ip="0.0.0.0",
+            bind_port=target_port,
+            reflect=mode == "reflect"
+        )
+    elif use_batch_engine:
+        run_udp_engine(
+            target_ip=target_ip,
+            target_port=target_port,
+            packet_size=packet_size,
+            num_senders=num_senders,
+            rate_mbps=rate_mbps,
+            duration=duration,
+            source_ips=[source_ip],
+            reflect=reflect
+        )
+    else:
+        send_udp_packets(
+            target_ip=target_ip,
+            target_port=target_port,
+            packet_size=packet_size,
+            packet_count=packet_count,
+            delay=delay_between_packets,
+            source_ip=source_ip
+        )
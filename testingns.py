@@ -7,6 +7,10 @@ import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urljoin
 import re
+from tgran_stream import BodyReader
+
+# Ukuran asset dihitung tanpa menyimpan body-nya
+BODY_READER = BodyReader()
 
 # Fungsi untuk masuk ke network namespace
 libc = ctypes.CDLL("libc.so.6", use_errno=True)
@@ -16,9 +20,6 @@ def setns(nspath, nstype=0x40000000):  # CLONE_NEWNET = 0x40000000
         if libc.setns(fd.fileno(), nstype) != 0:
             raise OSError(f"Failed to setns {nspath}")
 
-# Pindah ke network namespace "ue1"
-setns("/var/run/netns/ue1")
-
 
 class SourceIPAdapter(HTTPAdapter):
     def __init__(self, source_address, **kwargs):
@@ -44,8 +45,8 @@ def extract_links(html, base_url):
 
 def fetch_url(session, url):
     try:
-        response = session.get(url, timeout=5)
-        return len(response.content), response.status_code
+        response = session.get(url, timeout=5, stream=True)
+        return BODY_READER.consume(response), response.status_code
     except requests.exceptions.RequestException:
         return 0, None
 
@@ -62,7 +63,7 @@ def measure_performance(url):
         print(f"🕒 RTT (initial request only): {rtt:.2f} ms")
     except requests.exceptions.RequestException as e:
         print(f"💥 Error saat RTT: {e}")
-        return
+        return None
 
     links = extract_links(response.text, url)
     total_size = len(response.content)
@@ -82,7 +83,18 @@ def measure_performance(url):
     print(f"🚀 Throughput: {throughput:.2f} KB/s")
     print(f"⏱️ Latency (full fetch): {latency:.2f} ms")
 
+    return {
+        'rtt': rtt,
+        'total_size_kb': total_size / 1024,
+        'throughput_kbps': throughput,
+        'latency_ms': latency,
+        'status_code': status_code
+    }
+
 
 if __name__ == "__main__":
+    # Pindah ke network namespace "ue1"
+    setns("/var/run/netns/ue1")
+
     url = 'http://testasp.vulnweb.com/'
     measure_performance(url)
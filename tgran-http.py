@@ -2,18 +2,46 @@ import os
 import requests
 import numpy as np
 from datetime import datetime
-import pandas as pd
-import time
+import asyncio
 from concurrent.futures import ThreadPoolExecutor
+from tgran_scheduler import ArrivalScheduler
+from tgran_sampling import RequestSchedule, spawn_seeds
+from tgran_stats import TrafficStats
+from tgran_logwriter import LogWriter
+from tgran_stream import BodyReader
+from tgran_timing import TIMED_POOL_CLASSES, PHASE_COLUMNS, RequestPhases, begin_phases, finish_phases
+from tgran_overhead import GeneratorMonitor
+from tgran_metrics import LiveMetrics
+from tgran_catalog import open_catalog
+from tgran_tls import ResumingSSLContext, print_tls_report
+
+try:
+    import aiohttp  # hanya dibutuhkan untuk engine async
+except ImportError:
+    aiohttp = None
+
+LOG_COLUMNS = ["URL", "Start Time", "End Time", "RTT (ms)", "Status Code", "Source IP"] + PHASE_COLUMNS
 
 class SourceIPAdapter(requests.adapters.HTTPAdapter):
-    def __init__(self, source_address, **kwargs):
+    def __init__(self, source_address, ssl_context=None, **kwargs):
         self.source_address = source_address
+        self.ssl_context = ssl_context
         super(SourceIPAdapter, self).__init__(**kwargs)
 
     def init_poolmanager(self, *args, **kwargs):
         kwargs['source_address'] = (self.source_address, 0)
+        if self.ssl_context is not None:
+            kwargs['ssl_context'] = self.ssl_context
         super(SourceIPAdapter, self).init_poolmanager(*args, **kwargs)
+        # Koneksi yang mencatat waktu DNS/connect/TLS/wait per request (tgran_timing)
+        self.poolmanager.pool_classes_by_scheme = TIMED_POOL_CLASSES
+
+    def cert_verify(self, conn, url, verify, cert):
+        super(SourceIPAdapter, self).cert_verify(conn, url, verify, cert)
+        if self.ssl_context is not None:
+            # Verifikasi ditentukan ssl_context (CA sudah dimuat sekali), bukan verify per request
+            conn.cert_reqs = self.ssl_context.cert_reqs
+            conn.ca_certs = conn.ca_cert_dir = None
 
 def zipf_mandelbrot(N, q, s):
     ranks = np.arange(1, N + 1)
@@ -21,67 +49,178 @@ def zipf_mandelbrot(N, q, s):
     probabilities = weights / weights.sum()
     return probabilities
 
+# LogWriter aktif (dipasang oleh main); None = tulis langsung per baris
+LOG_WRITER = None
+
+# Body hanya dihitung lalu dibuang, lewat buffer yang dipakai ulang (main bisa memasang batas kecepatan)
+BODY_READER = BodyReader()
+
+# Metrics live per source IP (FlowMetrics, dipasang oleh main); VERBOSE = False mematikan print per request
+METRICS = None
+VERBOSE = True
+
 def log_to_log(data, filename='request_log_http.log'):
+    if LOG_WRITER is not None:
+        LOG_WRITER.write(data)
+        return
     with open(filename, mode='a') as file:
         file.write('\t'.join(map(str, data)) + '\n')
 
 def make_request(url, results, session):
+    source_ip = getattr(session.get_adapter(url), 'source_address', '')
+    if METRICS is not None:
+        METRICS.begin(source_ip)
     start_time = datetime.now()
+    size = 0
+    begin_phases()
     try:
-        response = session.get(url)
+        response = session.get(url, stream=True)
+        size = BODY_READER.consume(response)
+        phases = finish_phases()
         end_time = datetime.now()
         rtt = (end_time - start_time).total_seconds() * 1000
         if rtt < 1:
             rtt = 1
 
-        log_data = [url, start_time, end_time, rtt, 200]
+        log_data = [url, start_time, end_time, rtt, 200, source_ip] + phases
         results.append(log_data)
-        print(f"Request to {url} completed with status code: 200, RTT: {rtt:.6f} ms")
+        if VERBOSE:
+            print(f"Request to {url} completed with status code: 200, RTT: {rtt:.6f} ms")
     except requests.exceptions.RequestException as e:
+        phases = finish_phases()
         end_time = datetime.now()
         rtt = (end_time - start_time).total_seconds() * 1000
         if rtt < 1:
             rtt = 1
-        log_data = [url, start_time, end_time, rtt, f"Failed: {e}"]
+        log_data = [url, start_time, end_time, rtt, f"Failed: {e}", source_ip] + phases
         results.append(log_data)
-        print(f"Request to {url} failed: {e}, RTT: {rtt:.6f} ms")
+        if VERBOSE:
+            print(f"Request to {url} failed: {e}, RTT: {rtt:.6f} ms")
     
+    if METRICS is not None:
+        METRICS.record(log_data, size)
     log_to_log(log_data)
 
-def generate_traffic(urls, num_requests, requests_per_second, zipf_params, source_ips):
+async def make_request_async(url, results, session, source_ip):
+    if METRICS is not None:
+        METRICS.begin(source_ip)
+    start_time = datetime.now()
+    size = 0
+    phases = RequestPhases()
+    try:
+        async with session.get(url, trace_request_ctx=phases) as response:
+            size = await BODY_READER.consume_async(response)
+        phase_row = phases.finish()
+        end_time = datetime.now()
+        rtt = (end_time - start_time).total_seconds() * 1000
+        if rtt < 1:
+            rtt = 1
+
+        log_data = [url, start_time, end_time, rtt, 200, source_ip] + phase_row
+        results.append(log_data)
+        if VERBOSE:
+            print(f"Request to {url} completed with status code: 200, RTT: {rtt:.6f} ms")
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        phase_row = phases.finish()
+        end_time = datetime.now()
+        rtt = (end_time - start_time).total_seconds() * 1000
+        if rtt < 1:
+            rtt = 1
+        log_data = [url, start_time, end_time, rtt, f"Failed: {e}", source_ip] + phase_row
+        results.append(log_data)
+        if VERBOSE:
+            print(f"Request to {url} failed: {e}, RTT: {rtt:.6f} ms")
+
+    if METRICS is not None:
+        METRICS.record(log_data, size)
+    log_to_log(log_data)
+
+def make_sessions(source_ips, pool_size=10, verify=True, tls_resume=True):
+    """Returns one requests.Session per source IP (http and https) and their ResumingSSLContexts."""
+    # Satu SSLContext (cache session TLS) dan satu pool per source IP
+    contexts = [ResumingSSLContext(tls_resume, verify) for _ in source_ips]
+    sessions = [requests.Session() for _ in source_ips]
+    for session, ip, context in zip(sessions, source_ips, contexts):
+        adapter = SourceIPAdapter(ip, context, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+    return sessions, contexts
+
+def generate_traffic(urls, num_requests, requests_per_second, zipf_params, source_ips, arrival='constant', burst_size=10,
+                     seed=None, streaming_stats=False, pool_size=10, verify=True, tls_resume=True):
     probabilities = zipf_mandelbrot(len(urls), *zipf_params)
-    results = []
+    schedule_seed, arrival_seed = spawn_seeds(seed, 2)
+    schedule = RequestSchedule(probabilities, len(source_ips), num_requests, schedule_seed)
+    results = TrafficStats(LOG_COLUMNS) if streaming_stats else []
     executor = ThreadPoolExecutor(max_workers=100)
-    sessions = [requests.Session() for _ in source_ips]
-    for session, ip in zip(sessions, source_ips):
-        session.mount('http://', SourceIPAdapter(ip))
+    sessions, contexts = make_sessions(source_ips, pool_size, verify, tls_resume)
+    monitor = GeneratorMonitor(max_workers=100)
     
-    for i in range(num_requests):
-        url = np.random.choice(urls, p=probabilities)
-        session = np.random.choice(sessions)  # Pilih session secara acak dari IP yang tersedia
-        executor.submit(make_request, url, results, session)
-        time.sleep(1 / requests_per_second)
+    scheduler = ArrivalScheduler(num_requests, requests_per_second, arrival, burst_size, arrival_seed)
+    if METRICS is not None:
+        METRICS.start()
+    monitor.start()
+    for deadline, (url_idx, session_idx) in zip(scheduler, schedule):
+        monitor.submit(executor, deadline, make_request, urls[url_idx], results, sessions[session_idx])
 
     executor.shutdown(wait=True)
+    monitor.stop()
+    if METRICS is not None:
+        METRICS.stop()
+    if LOG_WRITER is not None:
+        LOG_WRITER.flush()
+    scheduler.print_report()
+    monitor.print_report()
+    print_tls_report(contexts)
+    return results
+
+def generate_traffic_async(urls, num_requests, requests_per_second, zipf_params, source_ips, max_in_flight=1000,
+                           arrival='constant', burst_size=10, seed=None, streaming_stats=False, verify=True):
+    from tgran_async import run_async_traffic
+    probabilities = zipf_mandelbrot(len(urls), *zipf_params)
+    schedule_seed, arrival_seed = spawn_seeds(seed, 2)
+    schedule = RequestSchedule(probabilities, len(source_ips), num_requests, schedule_seed)
+    scheduler = ArrivalScheduler(num_requests, requests_per_second, arrival, burst_size, arrival_seed)
+    results = TrafficStats(LOG_COLUMNS) if streaming_stats else []
+    # asyncio tidak bisa memberikan session TLS lama ke koneksi baru, jadi tanpa resumption
+    ssl_context = ResumingSSLContext(resume=False, verify=verify)
+    monitor = GeneratorMonitor()
+    if METRICS is not None:
+        METRICS.start()
+    run_async_traffic(make_request_async, urls, schedule, scheduler, source_ips, results, max_in_flight, ssl_context,
+                      monitor)
+    if METRICS is not None:
+        METRICS.stop()
+    if LOG_WRITER is not None:
+        LOG_WRITER.flush()
+    scheduler.print_report()
+    monitor.print_report()
     return results
 
 def calculate_totals_and_averages(results):
     if not results:
         print("No results to calculate totals and averages.")
-        return ["Total", "", "", 0, ""], ["Average", "", "", 0, ""]
+        padding = [""] * len(PHASE_COLUMNS)
+        return ["Total", "", "", 0, "", ""] + padding, ["Average", "", "", 0, "", ""] + padding
     
-    total_rtt = sum(result[3] for result in results)
-    average_rtt = total_rtt / len(results)
+    if isinstance(results, TrafficStats):
+        count, sums = results.totals()
+        total_rtt = sums['rtt']
+    else:
+        count = len(results)
+        total_rtt = sum(result[3] for result in results)
+    average_rtt = total_rtt / count
     
-    total_data = ["Total", "", "", total_rtt, ""]
-    average_data = ["Average", "", "", average_rtt, ""]
+    padding = [""] * len(PHASE_COLUMNS)
+    total_data = ["Total", "", "", total_rtt, "", ""] + padding
+    average_data = ["Average", "", "", average_rtt, "", ""] + padding
     
     return total_data, average_data
 
 def list_csv_files():
-    files = [f for f in os.listdir() if f.endswith('.csv')]
+    files = [f for f in os.listdir() if f.endswith(('.csv', '.tgc'))]
     if not files:
-        print("Tidak ada file CSV yang tersedia!")
+        print("Tidak ada file CSV/TGC yang tersedia!")
         exit()
     
     print("\n===== Pilih CSV File =====")
@@ -99,16 +238,17 @@ def list_csv_files():
             print("Input harus berupa angka!")
 
 def main():
+    global LOG_WRITER, BODY_READER, METRICS, VERBOSE
     print("############ Tunggu Sebentar ############")
 
     csv_file = list_csv_files()
     print(f"\nFile yang dipilih: {csv_file}")
 
-    df = pd.read_csv(csv_file)
-    urls = df['URL'].tolist()
+    # .tgc dibuka lazy (memmap), CSV dibaca tanpa pandas
+    urls = open_catalog(csv_file)
     
     with open('request_log_http.log', mode='w') as file:
-        file.write("URL\tStart Time\tEnd Time\tRTT (ms)\tStatus Code\n")
+        file.write('\t'.join(LOG_COLUMNS) + '\n')
 
     print("\n===== Masukkan Parameter Traffic =====")
     num_urls = int(input("Jumlah URL yang akan digunakan (-url): "))
@@ -117,17 +257,59 @@ def main():
     zipf_q = float(input("Zipf parameter q (-zipf q): "))
     zipf_s = float(input("Zipf parameter s (-zipf s): "))
     source_ips = input("Masukkan Source IPs (pisahkan dengan koma, contoh: 192.168.1.1,192.168.1.2): ").split(',')
+    arrival = input("Pola kedatangan (constant/poisson/burst) [constant]: ").strip().lower() or "constant"
+    burst_size = int(input("Ukuran burst [10]: ") or 10) if arrival == "burst" else 10
+    seed = input("Seed random (kosong = acak): ").strip()
+    seed = int(seed) if seed else None
+    engine = input("Engine (thread/async) [thread]: ").strip().lower() or "thread"
+    options = {'arrival': arrival, 'burst_size': burst_size, 'streaming_stats': True}
+    if engine == "async":
+        options['max_in_flight'] = int(input("Maksimum request in-flight [1000]: ") or 1000)
+    else:
+        options['pool_size'] = int(input("Ukuran pool koneksi per source IP [10]: ") or 10)
+        options['tls_resume'] = (input("TLS session resumption, n = selalu full handshake (y/n) [y]: ").strip().lower() or "y") == "y"
+    verify = input("Verifikasi sertifikat HTTPS (y/n/path file CA) [y]: ").strip() or "y"
+    options['verify'] = True if verify.lower() == "y" else False if verify.lower() == "n" else verify
+    max_rate = input("Batas kecepatan baca body per request (KB/s, kosong = tanpa batas): ").strip()
+    if max_rate:
+        BODY_READER = BodyReader(max_rate=float(max_rate) * 1024)
+    VERBOSE = (input("Tampilkan hasil tiap request, n = ringkasan per detik (y/n) [y]: ").strip().lower() or "y") == "y"
+    metrics_port = input("Port metrics Prometheus (kosong = tidak ada): ").strip()
+    if metrics_port or not VERBOSE:
+        METRICS = LiveMetrics(port=int(metrics_port) if metrics_port else None,
+                              summary_interval=None if VERBOSE else 1.0).flow('http', LOG_COLUMNS)
+    num_workers = int(input("Jumlah proses worker (1 = tanpa sharding) [1]: ") or 1)
+    log_format = input("Format log (tsv/columnar) [tsv]: ").strip().lower() or "tsv"
+
+    if log_format == "columnar":
+        # Baris per request ke file columnar, header dan Total/Average tetap di .log
+        open('request_log_http.tglc', 'wb').close()  # LogWriter menambah (append), jadi kosongkan run lama
+        LOG_WRITER = LogWriter('request_log_http.tglc', LOG_COLUMNS, 'columnar')
+    else:
+        LOG_WRITER = LogWriter('request_log_http.log', LOG_COLUMNS)
 
-    results = generate_traffic(urls[:num_urls], num_requests, requests_per_second, (zipf_q, zipf_s), source_ips)
+    traffic_fn = generate_traffic_async if engine == "async" else generate_traffic
+    if num_workers > 1:
+        from tgran_sharding import run_sharded
+        results = run_sharded(traffic_fn, urls[:num_urls], num_requests, requests_per_second, (zipf_q, zipf_s), source_ips,
+                              num_workers, seed, worker_globals={'LOG_WRITER': LOG_WRITER, 'METRICS': METRICS,
+                                                                 'BODY_READER': BODY_READER, 'VERBOSE': VERBOSE},
+                              **options)
+    else:
+        results = traffic_fn(urls[:num_urls], num_requests, requests_per_second, (zipf_q, zipf_s), source_ips,
+                             seed=seed, **options)
     
+    LOG_WRITER.close()
     total_data, average_data = calculate_totals_and_averages(results)
     
     with open('request_log_http.log', mode='a') as file:
         file.write('\t'.join(map(str, total_data)) + '\n')
         file.write('\t'.join(map(str, average_data)) + '\n')
     
+    results.print_report()
     print(f"\nTotal RTT: {total_data[3]:.2f} ms")
     print(f"Average RTT: {average_data[3]:.2f} ms")
+    print(f"\n🔎 Time series & breakdown lengkap: python tgran_analyze.py {LOG_WRITER.filename} --catalog {csv_file}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
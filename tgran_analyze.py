@@ -0,0 +1,504 @@
+import bisect
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from tgran_catalog import open_catalog
+from tgran_logwriter import CHUNK_MAGIC, chunk_offsets, read_chunks
+from tgran_stats import LatencyHistogram
+
+TIME_COLUMN = 'End Time'
+RTT_COLUMN = 'RTT (ms)'
+SIZE_COLUMN = 'Total Size (KB)'
+STRING_COLUMNS = ('URL', 'Status Code', 'Source IP')
+ANALYSIS_COLUMNS = (TIME_COLUMN, RTT_COLUMN, SIZE_COLUMN) + STRING_COLUMNS
+
+def _gather(buf, starts, ends):
+    """
+    Copies the fields ``buf[starts[i]:ends[i]]`` into one zero-padded uint8 matrix
+    (a row per field). ``buf`` must extend at least the widest field past its last field.
+    """
+    lengths = ends - starts
+    width = max(int(lengths.max()), 1) if len(lengths) else 1
+    # Lebar dibulatkan ke kelipatan 8 supaya tiap baris bisa dibaca sebagai uint64 (lihat _encode)
+    width += -width % 8
+    out = np.lib.stride_tricks.sliding_window_view(buf, width)[starts]
+    out[np.arange(width) >= lengths[:, None]] = 0
+    return out
+
+def _strings(matrix):
+    return matrix.view(f'S{matrix.shape[1]}').ravel()
+
+def _encode(matrix):
+    """
+    Dictionary-encodes the rows of a _gather matrix as (codes, unique bytes values).
+    Rows are grouped by a hash of their uint64 words, which is much cheaper than
+    sorting the strings; a hash collision is detected and falls back to np.unique.
+    """
+    words = matrix.view(np.uint64)
+    hashes = words[:, 0].copy()
+    for k in range(1, words.shape[1]):
+        hashes = hashes * np.uint64(0x9E3779B97F4A7C15) + words[:, k]
+    _, first, codes = np.unique(hashes, return_index=True, return_inverse=True)
+    raw = _strings(matrix)
+    values = raw[first]
+    if not np.array_equal(values[codes], raw):
+        values, codes = np.unique(raw, return_inverse=True)
+    return codes.ravel(), values
+
+def _to_float(raw):
+    try:
+        return raw.astype(np.float64)
+    except ValueError:
+        values = np.full(len(raw), np.nan)
+        for i, v in enumerate(raw.tolist()):
+            try:
+                values[i] = float(v)
+            except ValueError:
+                pass
+        return values
+
+def _to_seconds(matrix, width):
+    """
+    Naive local datetime fields (str(datetime): ``YYYY-MM-DD HH:MM:SS[.ffffff]``) to
+    epoch seconds, NaN where unparsable.
+    """
+    if width in (19, 26):
+        # Format tetap: tanggal lewat datetime64 (sedikit nilai unik), jam dari digit langsung
+        digits = matrix.astype(np.int64) - 48
+        date_codes, dates = _encode(np.pad(matrix[:, :10], ((0, 0), (0, 6))))
+        days = np.full(len(dates), np.nan)
+        for i, date in enumerate(dates.tolist()):
+            try:
+                day = np.datetime64(date.decode(), 'D')
+            except ValueError:
+                continue
+            if not np.isnat(day):
+                days[i] = day.astype(np.int64)
+        seconds = days[date_codes] * 86400.0 + (
+            (digits[:, 11] * 10 + digits[:, 12]) * 3600 + (digits[:, 14] * 10 + digits[:, 15]) * 60
+            + digits[:, 17] * 10 + digits[:, 18])
+        if width == 26:
+            fraction = digits[:, 20:26] @ np.array([100000, 10000, 1000, 100, 10, 1])
+            # str(datetime) tanpa mikrodetik lebih pendek (dipadding 0)
+            seconds += np.where(matrix[:, 19] == ord('.'), fraction, 0) / 1e6
+        seconds[(matrix[:, 13] != ord(':')) | (matrix[:, 16] != ord(':'))] = np.nan
+        return _to_epoch(seconds)
+    raw = _strings(matrix)
+    try:
+        stamps = raw.astype('datetime64[us]')
+    except ValueError:
+        stamps = np.full(len(raw), np.datetime64('NaT'), dtype='datetime64[us]')
+        for i, v in enumerate(raw.tolist()):
+            try:
+                stamps[i] = np.datetime64(v.decode(), 'us')
+            except ValueError:
+                pass
+    bad = np.isnat(stamps)
+    seconds = stamps.astype(np.int64) / 1e6
+    seconds[bad] = np.nan
+    return _to_epoch(seconds)
+
+def _to_epoch(seconds):
+    # Log TSV memakai waktu lokal, columnar epoch; samakan ke epoch
+    valid = seconds[~np.isnan(seconds)]
+    if len(valid):
+        seconds -= time.localtime(float(valid[0])).tm_gmtoff
+    return seconds
+
+def _parse_block(data, names, wanted):
+    buf = np.frombuffer(data, dtype=np.uint8)
+    ends = np.flatnonzero((buf == 9) | (buf == 10))
+    ncols = len(names)
+    if len(ends) != data.count(b'\n') * ncols:
+        # Baris rusak/terpotong (mis. tulisan proses lain), buang saja
+        lines = [line for line in data.split(b'\n') if line.count(b'\t') == ncols - 1]
+        if not lines:
+            return None
+        return _parse_block(b'\n'.join(lines) + b'\n', names, wanted)
+    ends = ends.reshape(-1, ncols)
+    starts = np.empty_like(ends)
+    starts[:, 1:] = ends[:, :-1] + 1
+    starts[0, 0] = 0
+    starts[1:, 0] = ends[:-1, -1] + 1
+    # Ruang kosong di belakang supaya _gather bisa menyalin selebar field terpanjang
+    buf = np.concatenate((buf, np.zeros(int((ends - starts).max()) + 8, dtype=np.uint8)))
+
+    chunk = {}
+    for name in wanted:
+        j = names.index(name)
+        field = _gather(buf, starts[:, j], ends[:, j])
+        if name == TIME_COLUMN:
+            chunk[name] = _to_seconds(field, int((ends[:, j] - starts[:, j]).max()))
+            continue
+        if name in STRING_COLUMNS:
+            codes, values = _encode(field)
+            chunk[name] = (codes, np.char.decode(values, 'utf-8', 'replace'))
+        else:
+            chunk[name] = _to_float(_strings(field))
+    return chunk
+
+def _is_columnar(filename):
+    with open(filename, 'rb') as file:
+        return file.read(len(CHUNK_MAGIC)) == CHUNK_MAGIC
+
+def tsv_chunks(filename, columns=None, chunk_bytes=32 << 20, start=None, stop=None):
+    """
+    Yields ``{column: array}`` chunks of a TSV request log in the read_chunks layout
+    (times as epoch floats, string columns as (codes, values)), reading ``chunk_bytes``
+    at a time and splitting fields with NumPy instead of per-line Python.
+
+    :param columns: Only these columns (default: all)
+    :param start: Byte offset of the first line to read (default: after the header)
+    :param stop: Byte offset to stop at, on a line boundary (see split_log)
+    """
+    with open(filename, 'rb') as file:
+        names = file.readline().rstrip(b'\r\n').decode().split('\t')
+        if TIME_COLUMN not in names:
+            raise ValueError(f"{filename}: header log tidak ditemukan")
+        wanted = [c for c in (columns or names) if c in names]
+        if start is not None:
+            file.seek(start)
+        rest = b''
+        while True:
+            size = chunk_bytes if stop is None else min(chunk_bytes, stop - file.tell())
+            block = file.read(size) if size > 0 else b''
+            data = rest + block
+            if not block:
+                if data and not data.endswith(b'\n'):
+                    data += b'\n'
+                rest = b''
+            else:
+                cut = data.rfind(b'\n') + 1
+                data, rest = data[:cut], data[cut:]
+            if data:
+                chunk = _parse_block(data, names, wanted)
+                if chunk is not None:
+                    yield chunk
+            if not block:
+                return
+
+def log_chunks(filename, columns=None, chunk_bytes=32 << 20, start=None, stop=None):
+    """Chunks of a request log (or of the ``start``-``stop`` part of it), columnar (.tglc, see read_chunks) or TSV."""
+    if not _is_columnar(filename):
+        yield from tsv_chunks(filename, columns, chunk_bytes, start, stop)
+        return
+    for chunk in read_chunks(filename, start or 0, stop):
+        yield {name: chunk[name] for name in (columns or chunk) if name in chunk}
+
+def split_log(filename, parts):
+    """
+    Splits a log into up to ``parts`` ``(start, stop)`` byte ranges of about equal
+    size: on line boundaries for TSV, on chunk boundaries for columnar logs.
+    """
+    if _is_columnar(filename):
+        offsets = chunk_offsets(filename)
+        end = os.path.getsize(filename)
+        if not offsets:
+            return []
+        bounds = sorted({offsets[min(bisect.bisect_left(offsets, end * i / parts), len(offsets) - 1)]
+                         for i in range(parts)})
+        return list(zip(bounds, bounds[1:] + [end]))
+    with open(filename, 'rb') as file:
+        file.readline()
+        first = file.tell()
+        end = os.fstat(file.fileno()).st_size
+        bounds = [first]
+        for i in range(1, parts):
+            file.seek(max(first + (end - first) * i // parts - 1, bounds[-1]))
+            file.readline()
+            if bounds[-1] < file.tell() < end:
+                bounds.append(file.tell())
+    return list(zip(bounds, bounds[1:] + [end]))
+
+def _as_codes(column):
+    """(codes, string values) of a column, also when a chunk stored it as numbers."""
+    if isinstance(column, tuple):
+        return column
+    values, codes = np.unique(column, return_inverse=True)
+    return codes, np.array([format(v, 'g') for v in values.tolist()], dtype=str)
+
+def _as_float(column):
+    if isinstance(column, tuple):
+        codes, values = column
+        return _to_float(values)[codes]
+    return np.asarray(column, dtype=np.float64)
+
+def rank_bin(rank):
+    """Label of the log10 bucket of a URL rank: 1, 2-10, 11-100, ... (0 = not ranked)."""
+    if rank <= 0:
+        return "?"
+    if rank == 1:
+        return "1"
+    digits = len(str(rank - 1))
+    return f"{10 ** (digits - 1) + 1}-{10 ** digits}"
+
+def _status_label(status):
+    # "Failed: <exception>" dikelompokkan jadi satu
+    return status.split(':', 1)[0].strip() or "?"
+
+def _is_error(label):
+    return not label.isdigit() or int(label) >= 400
+
+def _count_urls(filename, start=None, stop=None, chunk_bytes=32 << 20):
+    counts = {}
+    for chunk in log_chunks(filename, ['URL'], chunk_bytes, start, stop):
+        codes, values = _as_codes(chunk['URL'])
+        for url, n in zip(values.tolist(), np.bincount(codes, minlength=len(values)).tolist()):
+            if n:
+                counts[url] = counts.get(url, 0) + n
+    return counts
+
+def url_popularity(counts):
+    """``{url: rank}`` from request counts per URL (1 = most requested)."""
+    ranked = sorted(counts.items(), key=lambda kv: kv[1], reverse=True)
+    return {url: rank for rank, (url, _) in enumerate(ranked, 1)}
+
+def _record_grouped(target, labels, group, values, indexes):
+    """
+    Adds row ``i`` (``values[i]``, bucket ``indexes[i]``) to the histogram
+    ``target[labels[group[i]]]``, counting all (label, bucket) pairs in one bincount.
+    """
+    if not len(group):
+        return
+    names, label_of = np.unique(np.asarray(labels), return_inverse=True)
+    ids = label_of.ravel()[group]
+    names = names.tolist()
+    nbins = int(indexes.max()) + 1
+    keys = ids * nbins + indexes
+    if len(names) * nbins <= 1 << 22:
+        pair_counts = np.bincount(keys, minlength=len(names) * nbins)
+        keys = np.flatnonzero(pair_counts)
+        pair_counts = pair_counts[keys]
+    else:
+        # Banyak grup (mis. ribuan detik dalam satu chunk): hitung pasangan yang ada saja
+        keys, pair_counts = np.unique(keys, return_counts=True)
+    totals = np.bincount(ids, weights=values, minlength=len(names))
+    minimum = np.full(len(names), np.inf)
+    np.minimum.at(minimum, ids, values)
+    maximum = np.full(len(names), -np.inf)
+    np.maximum.at(maximum, ids, values)
+
+    key_ids = keys // nbins
+    bounds = np.flatnonzero(np.diff(key_ids)) + 1
+    for start, stop in zip(np.r_[0, bounds].tolist(), np.r_[bounds, len(keys)].tolist()):
+        k = int(key_ids[start])
+        hist = target.get(names[k])
+        if hist is None:
+            hist = target[names[k]] = LatencyHistogram()
+        hist.add_buckets((keys[start:stop] % nbins).tolist(), pair_counts[start:stop].tolist(), float(totals[k]),
+                         float(minimum[k]), float(maximum[k]))
+
+class LogAnalysis:
+    """
+    Per-second series and RTT breakdowns of a request log, built chunk by chunk.
+
+    Memory only grows with the number of seconds, status codes, source IPs and rank
+    buckets (one LatencyHistogram each), never with the number of rows. A row whose
+    status is not a number below 400 counts as an error, like in LiveMetrics.
+
+    :param ranks: ``{url: rank}`` for the per-rank breakdown (see url_popularity), or None
+    """
+
+    def __init__(self, ranks=None):
+        self.ranks = ranks
+        self.count = 0
+        self.errors = 0
+        self.rtt = LatencyHistogram()
+        self.seconds = {}
+        self.by_status = {}
+        self.by_source = {}
+        self.by_rank = {}
+        self.has_size = False
+
+    def add(self, chunk):
+        t = _as_float(chunk[TIME_COLUMN])
+        keep = ~np.isnan(t)
+        if not keep.any():
+            return
+        t = t[keep]
+        rtt = _as_float(chunk[RTT_COLUMN])[keep]
+        status_codes, status_values = _as_codes(chunk['Status Code'])
+        status_codes = status_codes[keep]
+        status_labels = [_status_label(s) for s in status_values.tolist()]
+        errors = np.array([_is_error(s) for s in status_labels], dtype=bool)[status_codes]
+        size = _as_float(chunk[SIZE_COLUMN])[keep] if SIZE_COLUMN in chunk else None
+
+        self.count += len(t)
+        self.errors += int(errors.sum())
+        timed = ~np.isnan(rtt)
+        rtt_timed = rtt[timed]
+        indexes = self.rtt.indexes(rtt_timed)
+
+        def record(target, labels, group):
+            _record_grouped(target, labels, group[timed], rtt_timed, indexes)
+
+        seconds, second_group = np.unique(np.floor(t).astype(np.int64), return_inverse=True)
+        counts = np.bincount(second_group, minlength=len(seconds))
+        failed = np.bincount(second_group, weights=errors, minlength=len(seconds))
+        if size is not None:
+            self.has_size = True
+            kb = np.bincount(second_group, weights=np.nan_to_num(size), minlength=len(seconds))
+        else:
+            kb = np.zeros(len(seconds))
+        hists = {}
+        for second, n, e, k in zip(seconds.tolist(), counts.tolist(), failed.tolist(), kb.tolist()):
+            entry = self.seconds.get(second)
+            if entry is None:
+                entry = self.seconds[second] = [0, 0, 0.0, LatencyHistogram()]
+            entry[0] += n
+            entry[1] += int(e)
+            entry[2] += k
+            hists[second] = entry[3]
+        record(hists, seconds, second_group)
+
+        record({'rtt': self.rtt}, ['rtt'], np.zeros(len(t), dtype=np.int64))
+        record(self.by_status, status_labels, status_codes)
+        if 'Source IP' in chunk:
+            codes, values = _as_codes(chunk['Source IP'])
+            record(self.by_source, values, codes[keep])
+        if self.ranks is not None and 'URL' in chunk:
+            codes, values = _as_codes(chunk['URL'])
+            record(self.by_rank, [rank_bin(self.ranks.get(url, 0)) for url in values.tolist()], codes[keep])
+
+    def merge(self, other):
+        self.count += other.count
+        self.errors += other.errors
+        self.has_size |= other.has_size
+        self.rtt.merge(other.rtt)
+        for second, (n, e, kb, hist) in other.seconds.items():
+            entry = self.seconds.get(second)
+            if entry is None:
+                self.seconds[second] = [n, e, kb, hist]
+            else:
+                entry[0] += n
+                entry[1] += e
+                entry[2] += kb
+                entry[3].merge(hist)
+        for mine, theirs in ((self.by_status, other.by_status), (self.by_source, other.by_source),
+                             (self.by_rank, other.by_rank)):
+            for key, hist in theirs.items():
+                if key in mine:
+                    mine[key].merge(hist)
+                else:
+                    mine[key] = hist
+        return self
+
+    def series(self):
+        """One row per second from the first to the last: (t, requests, errors, KB, p50, p90, p99, max)."""
+        if not self.seconds:
+            return []
+        first, last = min(self.seconds), max(self.seconds)
+        rows = []
+        for second in range(first, last + 1):
+            n, e, kb, hist = self.seconds.get(second) or (0, 0, 0.0, LatencyHistogram())
+            rows.append((second - first, n, e, kb, hist.percentile(50), hist.percentile(90), hist.percentile(99),
+                         hist.max if hist.count else 0.0))
+        return rows
+
+    def write_series(self, filename):
+        with open(filename, 'w') as file:
+            file.write("t (s)\tRPS\tErrors\tKB/s\tp50 (ms)\tp90 (ms)\tp99 (ms)\tMax (ms)\n")
+            for t, n, e, kb, p50, p90, p99, peak in self.series():
+                file.write(f"{t}\t{n}\t{e}\t{kb:.2f}\t{p50:.2f}\t{p90:.2f}\t{p99:.2f}\t{peak:.2f}\n")
+
+    def print_report(self, show=30, top=20):
+        rows = self.series()
+        print(f"\n===== Analisis log ({self.count} request, {self.errors} gagal, {len(rows)} detik) =====")
+        print("Metric\tCount\tp50\tp90\tp99\tp99.9\tMax")
+        s = self.rtt.summary()
+        print(f"rtt\t{s['count']}\t{s['p50']:.2f}\t{s['p90']:.2f}\t{s['p99']:.2f}\t{s['p99.9']:.2f}\t{s['max']:.2f}")
+        if rows:
+            rps = np.array([r[1] for r in rows])
+            print(f"RPS rata-rata {rps.mean():.1f} | min {rps.min()} | max {rps.max()}"
+                  + (f" | throughput rata-rata {sum(r[3] for r in rows) / len(rows):.1f} KB/s" if self.has_size else ""))
+
+            print("\n--- Per detik ---")
+            print("t (s)\tRPS\tErrors" + ("\tKB/s" if self.has_size else "") + "\tp50\tp99")
+            for t, n, e, kb, p50, p90, p99, peak in rows[:show]:
+                print(f"{t}\t{n}\t{e}" + (f"\t{kb:.1f}" if self.has_size else "") + f"\t{p50:.2f}\t{p99:.2f}")
+            if len(rows) > show:
+                print(f"... {len(rows) - show} detik lagi (pakai --series untuk semua)")
+
+        def rank_key(kv):
+            return int(kv[0].split('-')[0]) if kv[0][0].isdigit() else float('inf')
+
+        for title, groups, order in (("Status Code", self.by_status, None), ("Source IP", self.by_source, None),
+                                     ("URL Rank", self.by_rank, rank_key)):
+            if not groups:
+                continue
+            print(f"\n--- RTT (ms) per {title} ---")
+            print(f"{title}\tCount\tp50\tp90\tp99\tp99.9\tMax")
+            ranked = sorted(groups.items(), key=order) if order else \
+                sorted(groups.items(), key=lambda kv: kv[1].count, reverse=True)[:top]
+            for key, hist in ranked:
+                s = hist.summary()
+                print(f"{key}\t{s['count']}\t{s['p50']:.2f}\t{s['p90']:.2f}\t{s['p99']:.2f}\t{s['p99.9']:.2f}\t{s['max']:.2f}")
+
+def _analyze_part(filename, start, stop, ranks, chunk_bytes):
+    analysis = LogAnalysis(ranks)
+    for chunk in log_chunks(filename, ANALYSIS_COLUMNS, chunk_bytes, start, stop):
+        analysis.add(chunk)
+    # Rank tidak perlu dikirim balik ke proses utama
+    analysis.ranks = None
+    return analysis
+
+def analyze_log(filename, catalog=None, chunk_bytes=32 << 20, workers=1):
+    """
+    Analyses a TSV or columnar request log in one streaming pass (two without
+    ``catalog``: URL ranks then come from request counts in the log).
+
+    :param catalog: .csv/.tgc URL list of the run; its order is the Zipf rank
+    :param workers: Processes that each analyse one part of the log (see split_log)
+    """
+    parts = split_log(filename, workers) or [(None, None)]
+    names = [filename] * len(parts)
+    starts, stops = [p[0] for p in parts], [p[1] for p in parts]
+    sizes = [chunk_bytes] * len(parts)
+    with ProcessPoolExecutor(len(parts)) if len(parts) > 1 else _Inline() as pool:
+        if catalog is not None:
+            ranks = {url: rank for rank, url in enumerate(open_catalog(catalog), 1)}
+        else:
+            counts = {}
+            for part in pool.map(_count_urls, names, starts, stops, sizes):
+                for url, n in part.items():
+                    counts[url] = counts.get(url, 0) + n
+            ranks = url_popularity(counts)
+        analysis = LogAnalysis(ranks)
+        for part in pool.map(_analyze_part, names, starts, stops, [ranks] * len(parts), sizes):
+            analysis.merge(part)
+    return analysis
+
+class _Inline:
+    # Pengganti ProcessPoolExecutor untuk satu bagian: jalan di proses ini saja
+    map = staticmethod(map)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Analisis log request (TSV atau columnar) per detik dan per grup")
+    parser.add_argument('log', help="request_log_http.log, file .tglc, atau log scenario")
+    parser.add_argument('--catalog', help="CSV/TGC URL yang dipakai saat run (urutan = rank Zipf)")
+    parser.add_argument('--series', help="Tulis time series per detik ke file TSV ini")
+    parser.add_argument('--show', type=int, default=30, help="Jumlah detik yang ditampilkan di layar")
+    parser.add_argument('--chunk-mb', type=int, default=32, help="Ukuran blok baca TSV per proses (MB)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Jumlah proses analisis")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    analysis = analyze_log(args.log, args.catalog, args.chunk_mb << 20, max(args.workers, 1))
+    analysis.print_report(args.show)
+    if args.series:
+        analysis.write_series(args.series)
+        print(f"\n💾 Time series disimpan ke {args.series}")
+    print(f"\n⏱️ {analysis.count} baris dianalisis dalam {time.perf_counter() - started:.1f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+class IncrementalLinkScanner(HTMLParser):
+    """
+    Incremental tag scanner for <img src>, <script src> and <link href>.
+
+    Unlike the extract_links regex it can be fed the page chunk by chunk while it is
+    still arriving (tags split across chunks are buffered by HTMLParser), and it calls
+    ``on_link`` the moment a new absolute asset URL is seen.
+
+    :param base_url: Page URL used to resolve relative links
+    :param on_link: Optional callback ``(absolute_url)`` for each new link
+    """
+
+    ASSET_ATTRS = {'img': 'src', 'script': 'src', 'link': 'href'}
+
+    def __init__(self, base_url, on_link=None):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.on_link = on_link
+        self.links = set()
+
+    def handle_starttag(self, tag, attrs):
+        wanted = self.ASSET_ATTRS.get(tag)
+        if wanted is None:
+            return
+        for name, value in attrs:
+            if name == wanted and value:
+                link = urljoin(self.base_url, value)
+                if link not in self.links:
+                    self.links.add(link)
+                    if self.on_link is not None:
+                        self.on_link(link)
+
+class LinkCache:
+    """
+    Size-bounded LRU cache from page URL to the asset links extracted from it.
+
+    Under Zipf traffic the same few pages are requested over and over; with the cache
+    their HTML is decoded and scanned once. When ``validate`` is on, an entry is only
+    reused while the page's ETag/Last-Modified headers are unchanged (pages that send
+    neither are treated as static).
+
+    :param max_entries: Maximum number of pages kept
+    :param validate: Re-extract when ETag/Last-Modified differ from the cached ones
+    """
+
+    def __init__(self, max_entries=1024, validate=True):
+        self.max_entries = max_entries
+        self.validate = validate
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url, headers, load_html, extract):
+        """
+        Returns the links of ``url``, calling ``extract(load_html(), url)`` only on a miss.
+
+        :param headers: Response headers (mapping) used for validation
+        :param load_html: Callable returning the decoded page body
+        :param extract: extract_links-style function ``(html, base_url) -> links``
+        """
+        validators = (headers.get('ETag'), headers.get('Last-Modified'))
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None and (not self.validate or entry[0] == validators):
+                self._entries.move_to_end(url)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        links = extract(load_html(), url)
+        with self._lock:
+            self._entries[url] = (validators, links)
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return links
+
+    def invalidate(self, url=None):
+        with self._lock:
+            if url is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(url, None)
+
+class AssetFetcher:
+    """
+    Long-lived thread pool shared by all page loads for fetching sub-resources.
+
+    Replaces the ThreadPoolExecutor(max_workers=10) that used to be created and torn
+    down per page. ``per_page`` still limits how many assets of one page are in flight,
+    like a browser's per-host connection limit. The pool is recreated after a fork.
+
+    :param max_workers: Size of the shared pool
+    :param per_page: Maximum concurrent asset fetches for one page
+    """
+
+    def __init__(self, max_workers=200, per_page=10):
+        self.max_workers = max_workers
+        self.per_page = per_page
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='asset')
+                    self._pid = os.getpid()
+        return self._executor
+
+    def page(self, fetch, session):
+        """Starts a PageFetch whose assets can be added one by one as they are discovered."""
+        return PageFetch(self._pool(), fetch, session, self.per_page)
+
+    def fetch_all(self, fetch, session, links):
+        """Runs ``fetch(session, link)`` for every link and returns the summed sizes."""
+        page = self.page(fetch, session)
+        for link in links:
+            page.add(link)
+        return page.wait()
+
+    def shutdown(self):
+        if self._pid == os.getpid():
+            self._executor.shutdown(wait=True)
+            self._pid = None
+
+class PageFetch:
+    """
+    Asset fetches of one page on the shared pool, at most ``per_page`` at a time.
+
+    ``add`` never blocks: links beyond the per-page limit wait in a backlog and are
+    submitted from the completion callback of an earlier fetch. ``last_done`` is the
+    time.time() at which the most recent asset finished.
+    """
+
+    def __init__(self, pool, fetch, session, per_page):
+        self._pool = pool
+        self._fetch = fetch
+        self._session = session
+        self._per_page = per_page
+        self._lock = threading.Lock()
+        self._backlog = deque()
+        self._running = 0
+        self._outstanding = 0
+        self._idle = threading.Event()
+        self._idle.set()
+        self.total_size = 0
+        self.last_done = None
+
+    def add(self, link):
+        with self._lock:
+            self._outstanding += 1
+            self._idle.clear()
+            if self._running >= self._per_page:
+                self._backlog.append(link)
+                return
+            self._running += 1
+        self._submit(link)
+
+    def _submit(self, link):
+        self._pool.submit(self._fetch, self._session, link).add_done_callback(self._done)
+
+    def _done(self, future):
+        size = future.result()[0] if future.exception() is None else 0
+        with self._lock:
+            self.total_size += size
+            self.last_done = time.time()
+            self._outstanding -= 1
+            next_link = self._backlog.popleft() if self._backlog else None
+            if next_link is None:
+                self._running -= 1
+            if self._outstanding == 0:
+                self._idle.set()
+        if next_link is not None:
+            self._submit(next_link)
+
+    def wait(self):
+        """Blocks until every added asset finished and returns their summed size."""
+        self._idle.wait()
+        return self.total_size
@@ -0,0 +1,67 @@
+import asyncio
+import aiohttp
+from tgran_timing import aiohttp_trace_config
+
+async def _run_async_traffic(request_coro, urls, schedule, scheduler, source_ips, results, max_in_flight, ssl_context,
+                             monitor):
+    semaphore = asyncio.Semaphore(max_in_flight)
+    pending = set()
+
+    # Satu ClientSession per source IP, sama seperti SourceIPAdapter di engine thread
+    sessions = []
+    trace = aiohttp_trace_config()
+    for ip in source_ips:
+        connector = aiohttp.TCPConnector(local_addr=(ip, 0), limit=max_in_flight,
+                                         ssl=ssl_context if ssl_context is not None else True)
+        sessions.append(aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=30),
+                                              trace_configs=[trace]))
+
+    async def run_one(url, session, ip, deadline):
+        start = monitor.begin(deadline) if monitor is not None else None
+        try:
+            await request_coro(url, results, session, ip)
+        finally:
+            semaphore.release()
+            if monitor is not None:
+                monitor.end(deadline, start)
+
+    pairs = iter(schedule)
+    try:
+        async for deadline in scheduler:
+            url_idx, idx = next(pairs)
+            if monitor is not None:
+                monitor.queue()
+            await semaphore.acquire()
+            task = asyncio.ensure_future(run_one(urls[url_idx], sessions[idx], source_ips[idx], deadline))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    finally:
+        for session in sessions:
+            await session.close()
+
+def run_async_traffic(request_coro, urls, schedule, scheduler, source_ips, results, max_in_flight=1000, ssl_context=None,
+                      monitor=None):
+    """
+    Runs the traffic loop on a single asyncio event loop instead of a thread pool.
+
+    :param request_coro: Coroutine ``(url, results, session, source_ip)`` that performs one request
+    :param urls: URL list, ordered by Zipf rank
+    :param schedule: RequestSchedule yielding (url index, source index) pairs
+    :param scheduler: ArrivalScheduler that releases each request on its deadline
+    :param source_ips: Source IPs to bind, one aiohttp session each
+    :param results: List (or TrafficStats) that request_coro appends its log rows to
+    :param max_in_flight: Cap on concurrently outstanding requests
+    :param ssl_context: SSLContext for https URLs (None = aiohttp default verification)
+    :param monitor: Optional GeneratorMonitor; the loop CPU it reports is the whole event loop
+    """
+    if monitor is not None:
+        monitor.start()
+    try:
+        asyncio.run(_run_async_traffic(request_coro, urls, schedule, scheduler, source_ips, results, max_in_flight,
+                                       ssl_context, monitor))
+    finally:
+        if monitor is not None:
+            monitor.stop()
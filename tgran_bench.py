@@ -0,0 +1,382 @@
+import argparse
+import gc
+import http.server
+import json
+import multiprocessing as mp
+import os
+import resource
+import socket
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+from tgran_scenario import FLOW_SCRIPTS, load_script, install_log_writers
+
+PAYLOAD = b'x' * (1 << 20)
+# Jenis aset yang disisipkan di halaman, bergantian
+ASSET_TAGS = (
+    ('css', '<link rel="stylesheet" href="/asset/{i}.css">'),
+    ('js', '<script src="/asset/{i}.js"></script>'),
+    ('png', '<img src="/asset/{i}.png">'),
+)
+REQUEST_ENGINES = ('http-thread', 'http-async', 'web-thread', 'web-async')
+BENCHMARKS = REQUEST_ENGINES + ('udp-batch', 'udp-plain', 'tcp-bulk')
+# Untuk rate, nilai lebih kecil berarti regresi; untuk CPU dan memori sebaliknya
+LOWER_IS_WORSE = {'rate': True, 'cpu_us': False, 'mem_kb': False}
+
+def _payload(size):
+    return PAYLOAD[:size] if size <= len(PAYLOAD) else b'x' * size
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Answers every GET from memory: ``/``, ``*.html`` and ``/page/...`` are HTML pages with
+    embedded css/js/png assets, everything else is an opaque object. Query parameters
+    ``size``, ``assets`` and ``delay`` (ms) override the server defaults per request.
+    """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        path, _, query = self.path.partition('?')
+        params = dict(urllib.parse.parse_qsl(query))
+        config = self.server.config
+        delay = float(params.get('delay', config['delay_ms']))
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if path == '/' or path.endswith('.html') or path.startswith('/page'):
+            body = self.server.page(int(params.get('assets', config['assets'])), int(params.get('size', config['page_size'])))
+            content_type = 'text/html'
+        else:
+            body = _payload(int(params.get('size', config['asset_size'])))
+            content_type = 'application/octet-stream'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class StandInServer(http.server.ThreadingHTTPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, config, reuse_port=False):
+        self.config = config
+        self.reuse_port = reuse_port
+        self._pages = {}
+        super().__init__(address, StandInHandler)
+
+    def server_bind(self):
+        if self.reuse_port:
+            # Beberapa proses server di port yang sama, kernel membagi koneksinya
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+    def page(self, assets, size):
+        key = (assets, size)
+        if key not in self._pages:
+            links = ''.join(ASSET_TAGS[i % len(ASSET_TAGS)][1].format(i=i) for i in range(assets))
+            head = f"<html><head>{links}</head><body>".encode()
+            tail = b"</body></html>"
+            self._pages[key] = head + _payload(max(size - len(head) - len(tail), 0)) + tail
+        return self._pages[key]
+
+def serve_standin(bind_ip='127.0.0.1', port=18080, page_size=20000, assets=10, asset_size=2000, delay_ms=0.0,
+                  reuse_port=False):
+    """
+    Local stand-in for the web servers the scripts normally target.
+
+    :param bind_ip: Local IP to listen on
+    :param port: TCP port
+    :param page_size: Size of HTML pages in bytes
+    :param assets: Embedded assets (css/js/png, round-robin) per page
+    :param asset_size: Size of assets and other objects in bytes
+    :param delay_ms: Latency injected before every response
+    :param reuse_port: Bind with SO_REUSEPORT so several processes can share the port
+    """
+    config = {'page_size': page_size, 'assets': assets, 'asset_size': asset_size, 'delay_ms': delay_ms}
+    StandInServer((bind_ip, port), config, reuse_port).serve_forever()
+
+def _wait_for_port(ip, port, timeout=10.0):
+    deadline = time.time() + timeout
+    while True:
+        try:
+            socket.create_connection((ip, port), timeout=1).close()
+            return
+        except OSError:
+            if time.time() > deadline:
+                raise
+            time.sleep(0.05)
+
+def _quiet(target, *args, **kwargs):
+    # stdout proses anak (dan turunannya) dibuang supaya laporan benchmark tetap terbaca
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    sys.stdout = open(1, 'w', closefd=False)
+    return target(*args, **kwargs)
+
+def start_background(target, *args, **kwargs):
+    """Runs a blocking server function (stand-in, sink) in a silent daemon process."""
+    process = mp.Process(target=_quiet, args=(target,) + args, kwargs=kwargs, daemon=True)
+    process.start()
+    return process
+
+def start_standin_server(bind_ip='127.0.0.1', port=18080, processes=1, **config):
+    """Starts ``processes`` stand-in server processes on one port and waits until it accepts."""
+    servers = [start_background(serve_standin, bind_ip, port, reuse_port=processes > 1, **config)
+               for _ in range(processes)]
+    _wait_for_port(bind_ip, port)
+    return servers
+
+def _rss():
+    with open('/proc/self/statm') as file:
+        return int(file.read().split()[1]) * resource.getpagesize()
+
+class PeakRSS:
+    """Samples the resident set size of this process in a thread and keeps the peak."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.baseline = self.peak = _rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _rss())
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.peak - self.baseline
+
+def _traffic(engine, base_url, num_requests, rate, max_in_flight, workdir, delay_ms=0):
+    kind, mode = engine.split('-')
+    module = load_script(FLOW_SCRIPTS[kind])
+    install_log_writers([kind], os.path.join(workdir, engine))
+    query = f"?delay={delay_ms:g}" if delay_ms else ""
+    path = "page/{}.html" if kind == 'web' else "obj/{}"
+    urls = [f"{base_url}/{path.format(i)}{query}" for i in range(100)]
+    if mode == 'async':
+        if module.aiohttp is None:
+            raise RuntimeError("aiohttp belum terinstall")
+        return module.generate_traffic_async(urls, num_requests, rate, (1.0, 1.0), ['127.0.0.1'], max_in_flight,
+                                             streaming_stats=True)
+    return module.generate_traffic(urls, num_requests, rate, (1.0, 1.0), ['127.0.0.1'], streaming_stats=True)
+
+def bench_rate(engine, base_url, num_requests=3000, max_in_flight=500, workdir='.'):
+    """Maximum request rate and CPU per request of one engine, arrivals released as fast as it takes them."""
+    cpu = time.process_time()
+    start = time.perf_counter()
+    results = _traffic(engine, base_url, num_requests, 1e9, max_in_flight, workdir)
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+    count = len(results)
+    return {'rate': count / elapsed, 'unit': 'req/s', 'cpu_us': cpu / max(count, 1) * 1e6, 'errors': results.errors,
+            'count': count}
+
+def bench_memory(engine, base_url, delay_ms=500, max_in_flight=500, workdir='.'):
+    """
+    Memory per in-flight request: the engine is held at its concurrency cap (100 threads,
+    or ``max_in_flight`` for async) against responses delayed by ``delay_ms`` and the
+    RSS growth is divided by the number of requests in flight. A short warm-up run first
+    loads the script, log writer and sessions, so they are not counted as per-request memory.
+    """
+    in_flight = max_in_flight if engine.endswith('async') else 100
+    rate = in_flight / (delay_ms / 1000)
+    _traffic(engine, base_url, 50, 1e9, max_in_flight, workdir)
+    gc.collect()
+    peak = PeakRSS()
+    _traffic(engine, base_url, int(rate * 3), rate, max_in_flight, workdir, delay_ms)
+    return {'mem_kb': peak.stop() / in_flight / 1024}
+
+def bench_udp(engine, port, packets=500000, packet_size=512):
+    """Packets per second and CPU per packet of the sendmmsg engine or of send_udp_packets."""
+    import testing_udp
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = time.process_time()
+    start = time.perf_counter()
+    if engine == 'udp-batch':
+        sent = testing_udp.run_udp_engine('127.0.0.1', port, packet_size, packet_count=packets, duration=None,
+                                          report_interval=3600)['packets']
+    else:
+        packets //= 10  # sendto per paket jauh lebih lambat
+        testing_udp.send_udp_packets('127.0.0.1', port, packet_size, packets)
+        sent = packets
+    elapsed = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = time.process_time() - cpu + (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    return {'rate': sent / elapsed, 'unit': 'pkt/s', 'cpu_us': cpu / max(sent, 1) * 1e6, 'mem_kb': None,
+            'errors': 0, 'count': sent}
+
+def bench_tcp_bulk(port, duration=3):
+    """Goodput and CPU per MB of tgran_bulk.run_tcp_bulk on loopback."""
+    from tgran_bulk import run_tcp_bulk
+    cpu = time.process_time()
+    summary = run_tcp_bulk('127.0.0.1', port, ['127.0.0.1'], duration=duration, report_interval=3600)
+    cpu = time.process_time() - cpu
+    megabytes = summary['bytes'] / 1e6
+    return {'rate': summary['bytes'] * 8 / summary['elapsed'] / 1e6, 'unit': 'Mbps',
+            'cpu_us': cpu / max(megabytes, 1e-9) * 1e6, 'mem_kb': None, 'errors': 0, 'count': int(megabytes)}
+
+def _isolated(queue, name, fn, args, kwargs):
+    try:
+        result = _quiet(fn, *args, **kwargs)
+    except Exception as e:
+        result = {'error': f"{type(e).__name__}: {e}"}
+    queue.put((name, result))
+
+def run_isolated(name, fn, *args, **kwargs):
+    """Runs one benchmark in a fresh process so RSS and CPU are not polluted by earlier runs."""
+    queue = mp.Queue()
+    process = mp.Process(target=_isolated, args=(queue, name, fn, args, kwargs))
+    process.start()
+    _, result = queue.get()
+    process.join()
+    return result
+
+def run_benchmarks(names=BENCHMARKS, num_requests=3000, delay_ms=500, max_in_flight=500, http_port=18090,
+                   udp_port=19999, tcp_port=15201, server_processes=2):
+    """
+    Starts the stand-in server and sinks on loopback and benchmarks each engine in ``names``.
+
+    :param names: Benchmarks to run (see BENCHMARKS)
+    :param num_requests: Requests per max-rate run of a request engine
+    :param delay_ms: Injected server latency for the memory-per-in-flight run
+    :param max_in_flight: Concurrency cap of the async engines
+    :param server_processes: Stand-in server processes sharing the HTTP port
+    """
+    from testing_udp import run_udp_receiver
+    from tgran_bulk import run_tcp_sink
+    background = []
+    if any(name in REQUEST_ENGINES for name in names):
+        background += start_standin_server('127.0.0.1', http_port, server_processes)
+    if any(name.startswith('udp') for name in names):
+        background.append(start_background(run_udp_receiver, '127.0.0.1', udp_port, report_interval=3600))
+    if 'tcp-bulk' in names:
+        background.append(start_background(run_tcp_sink, '127.0.0.1', tcp_port, report_interval=3600))
+        _wait_for_port('127.0.0.1', tcp_port)
+
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for name in names:
+                print(f"⏳ {name}...", flush=True)
+                if name in REQUEST_ENGINES:
+                    base_url = f"http://127.0.0.1:{http_port}"
+                    result = run_isolated(name, bench_rate, name, base_url, num_requests, max_in_flight, workdir)
+                    if 'error' not in result:
+                        result.update(run_isolated(name, bench_memory, name, base_url, delay_ms, max_in_flight, workdir))
+                elif name.startswith('udp'):
+                    result = run_isolated(name, bench_udp, name, udp_port)
+                else:
+                    result = run_isolated(name, bench_tcp_bulk, tcp_port)
+                results[name] = result
+    finally:
+        for process in background:
+            process.terminate()
+    return results
+
+def print_results(results, baseline=None, tolerance=0.1):
+    """Prints the benchmark table; with a baseline also the change per metric. Returns the regressions."""
+    regressions = []
+    print("\n===== Benchmark generator =====")
+    print("Benchmark\tRate\t\tCPU/op (us)\tMem/in-flight (KB)\tError")
+    for name, r in results.items():
+        if 'error' in r:
+            print(f"{name}\t❌ {r['error']}")
+            continue
+        mem = f"{r['mem_kb']:.1f}" if r['mem_kb'] is not None else "-"
+        line = f"{name}\t{r['rate']:,.0f} {r['unit']}\t{r['cpu_us']:.1f}\t\t{mem}\t\t\t{r['errors']}"
+        old = (baseline or {}).get(name)
+        if old and 'error' not in old:
+            changes = []
+            for metric, lower_is_worse in LOWER_IS_WORSE.items():
+                if r.get(metric) is None or not old.get(metric):
+                    continue
+                change = r[metric] / old[metric] - 1
+                changes.append(f"{metric} {change * 100:+.1f}%")
+                if (change < -tolerance) if lower_is_worse else (change > tolerance):
+                    regressions.append(f"{name}: {metric} {old[metric]:.1f} -> {r[metric]:.1f} ({change * 100:+.1f}%)")
+            line += "\t(" + ", ".join(changes) + ")"
+        print(line)
+    if regressions:
+        print(f"\n⚠️ REGRESI dibanding baseline (toleransi {tolerance * 100:g}%):")
+        for regression in regressions:
+            print(f"   - {regression}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Server pengganti lokal dan benchmark throughput generator")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    serve = sub.add_parser('serve', help="Jalankan server HTTP pengganti")
+    serve.add_argument('--bind', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=18080)
+    serve.add_argument('--page-size', type=int, default=20000, help="Ukuran halaman HTML (byte)")
+    serve.add_argument('--assets', type=int, default=10, help="Jumlah aset per halaman")
+    serve.add_argument('--asset-size', type=int, default=2000, help="Ukuran aset/objek (byte)")
+    serve.add_argument('--delay-ms', type=float, default=0, help="Latency yang disisipkan per response")
+    serve.add_argument('--processes', type=int, default=1, help="Jumlah proses server (SO_REUSEPORT)")
+
+    udp = sub.add_parser('udp-sink', help="Jalankan sink UDP (testing_udp.run_udp_receiver)")
+    udp.add_argument('--bind', default='127.0.0.1')
+    udp.add_argument('--port', type=int, default=9999)
+    udp.add_argument('--reflect', action='store_true')
+
+    tcp = sub.add_parser('tcp-sink', help="Jalankan sink TCP (tgran_bulk.run_tcp_sink)")
+    tcp.add_argument('--bind', default='127.0.0.1')
+    tcp.add_argument('--port', type=int, default=5201)
+
+    run = sub.add_parser('run', help="Jalankan benchmark")
+    run.add_argument('benchmarks', nargs='*', metavar='BENCHMARK', help=f"Subset dari {', '.join(BENCHMARKS)} (default semua)")
+    run.add_argument('--requests', type=int, default=3000, help="Request per run max-rate")
+    run.add_argument('--delay-ms', type=float, default=500, help="Latency server untuk run memori")
+    run.add_argument('--max-in-flight', type=int, default=500, help="Batas request bersamaan engine async")
+    run.add_argument('--server-processes', type=int, default=2)
+    run.add_argument('--save', help="Simpan hasil ke file JSON (baseline)")
+    run.add_argument('--baseline', help="Bandingkan dengan file JSON baseline")
+    run.add_argument('--tolerance', type=float, default=0.1, help="Perubahan yang dianggap regresi (0.1 = 10%%)")
+    args = parser.parse_args(argv)
+    unknown = set(getattr(args, 'benchmarks', ())) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"benchmark tidak dikenal: {', '.join(sorted(unknown))}")
+
+    if args.command == 'serve':
+        servers = start_standin_server(args.bind, args.port, args.processes, page_size=args.page_size,
+                                       assets=args.assets, asset_size=args.asset_size, delay_ms=args.delay_ms)
+        print(f"🌐 Server pengganti di http://{args.bind}:{args.port}/ ({args.processes} proses), Ctrl+C untuk berhenti")
+        try:
+            for server in servers:
+                server.join()
+        except KeyboardInterrupt:
+            pass
+    elif args.command == 'udp-sink':
+        from testing_udp import run_udp_receiver
+        run_udp_receiver(args.bind, args.port, args.reflect)
+    elif args.command == 'tcp-sink':
+        from tgran_bulk import run_tcp_sink
+        run_tcp_sink(args.bind, args.port)
+    else:
+        results = run_benchmarks(args.benchmarks or BENCHMARKS, args.requests, args.delay_ms, args.max_in_flight,
+                                 server_processes=args.server_processes)
+        baseline = None
+        if args.baseline:
+            with open(args.baseline) as file:
+                baseline = json.load(file)
+        regressions = print_results(results, baseline, args.tolerance)
+        if args.save:
+            with open(args.save, 'w') as file:
+                json.dump(results, file, indent=2)
+            print(f"💾 Hasil disimpan ke {args.save}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+import mmap
+import os
+import socket
+import struct
+import tempfile
+import threading
+import time
+
+TCP_INFO = getattr(socket, 'TCP_INFO', 11)
+# struct tcp_info (linux/tcp.h) sampai tcpi_total_retrans, lalu tcpi_bytes_acked di offset 120
+_TCP_INFO_HEAD = struct.Struct('<8B24I')
+_TCP_INFO_BYTES_ACKED = struct.Struct('<Q')
+
+def tcp_info(sock):
+    """
+    Reads the kernel's TCP_INFO for a connected socket.
+
+    Returns ``rtt_ms``, ``rttvar_ms``, ``snd_cwnd`` (segments), ``snd_mss``,
+    ``total_retrans`` (segments) and ``bytes_acked`` when available, or None on
+    platforms without TCP_INFO.
+    """
+    try:
+        raw = sock.getsockopt(socket.IPPROTO_TCP, TCP_INFO, 256)
+    except OSError:
+        return None
+    if len(raw) < _TCP_INFO_HEAD.size:
+        return None
+    fields = _TCP_INFO_HEAD.unpack_from(raw)
+    u32 = fields[8:]
+    info = {
+        'snd_mss': u32[2],
+        'rtt_ms': u32[15] / 1000,
+        'rttvar_ms': u32[16] / 1000,
+        'snd_cwnd': u32[18],
+        'total_retrans': u32[23],
+    }
+    if len(raw) >= 120 + _TCP_INFO_BYTES_ACKED.size:
+        (info['bytes_acked'],) = _TCP_INFO_BYTES_ACKED.unpack_from(raw, 120)
+    return info
+
+def make_send_buffer(size):
+    """
+    Creates the payload that every stream sends: an unlinked temp file filled with
+    random bytes through mmap. socket.sendfile() then hands the file's pages straight
+    to the kernel, without copying them through Python for every write.
+    """
+    file = tempfile.TemporaryFile()
+    file.truncate(size)
+    with mmap.mmap(file.fileno(), size) as view:
+        view[:] = os.urandom(size)
+    return file
+
+class BulkStream:
+    """
+    One TCP bulk stream (like one iperf -P stream) from ``source_ip``.
+
+    ``run`` sends the shared payload file over and over with socket.sendfile() until
+    ``duration`` seconds passed or ``transfer_bytes`` were sent. ``sent`` is updated
+    after every sendfile() call so a reporter thread can read it at any time.
+    """
+
+    def __init__(self, index, target_ip, target_port, source_ip, payload, payload_size):
+        self.index = index
+        self.source_ip = source_ip
+        self.payload = payload
+        self.payload_size = payload_size
+        self.sent = 0
+        self.error = None
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if source_ip:
+            self.sock.bind((source_ip, 0))
+        self.sock.connect((target_ip, target_port))
+
+    def run(self, duration, transfer_bytes):
+        deadline = time.perf_counter() + duration if duration else None
+        try:
+            while transfer_bytes is None or self.sent < transfer_bytes:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                count = self.payload_size
+                if transfer_bytes is not None:
+                    count = min(count, transfer_bytes - self.sent)
+                self.sent += self.sock.sendfile(self.payload, 0, count)
+            self.sock.shutdown(socket.SHUT_WR)
+        except OSError as e:
+            self.error = e
+
+    def info(self):
+        return tcp_info(self.sock)
+
+    def delivered(self, info=None):
+        """
+        Bytes the receiver acknowledged (tcpi_bytes_acked), or the bytes handed to
+        sendfile() when the kernel does not report it.
+        """
+        info = info if info is not None else self.info()
+        if info and 'bytes_acked' in info:
+            # SYN/FIN ikut dihitung kernel, jadi dibatasi ke byte yang benar-benar dikirim
+            return min(info['bytes_acked'], self.sent)
+        return self.sent
+
+    def close(self):
+        self.sock.close()
+
+def run_tcp_bulk(target_ip, target_port, source_ips, streams_per_ip=1, duration=10, transfer_bytes=None,
+                 buffer_size=4 * 1024 * 1024, report_interval=1.0):
+    """
+    iperf-style TCP bulk sender with parallel streams per source IP.
+
+    Goodput counts bytes acknowledged by the receiver (TCP_INFO bytes_acked), not bytes
+    queued into the send buffer; without bytes_acked the sent bytes are used instead.
+
+    :param target_ip: IP of the sink (run_tcp_sink)
+    :param target_port: TCP port of the sink
+    :param source_ips: Local IPs to send from ('' = default route)
+    :param streams_per_ip: Parallel streams opened from each source IP
+    :param duration: Seconds to send (None = until transfer_bytes are sent)
+    :param transfer_bytes: Bytes per stream (None = until duration ends)
+    :param buffer_size: Size of the payload handed to each sendfile() call
+    :param report_interval: Seconds between goodput/TCP_INFO lines
+    """
+    if not duration and not transfer_bytes:
+        raise ValueError("Isi duration atau transfer_bytes")
+    payload = make_send_buffer(buffer_size)
+    streams = []
+    for ip in source_ips:
+        for _ in range(streams_per_ip):
+            streams.append(BulkStream(len(streams), target_ip, target_port, ip.strip(), payload, buffer_size))
+
+    print(f"🚀 {len(streams)} stream TCP ({streams_per_ip} per source IP) ke {target_ip}:{target_port}")
+    threads = [threading.Thread(target=s.run, args=(duration, transfer_bytes), daemon=True) for s in streams]
+    start_time = time.time()
+    for thread in threads:
+        thread.start()
+
+    next_report = start_time + report_interval
+    previous_bytes = 0
+    previous_retrans = 0
+    while any(thread.is_alive() for thread in threads):
+        time.sleep(max(0.0, min(next_report - time.time(), 0.05)))
+        now = time.time()
+        if now < next_report:
+            continue
+        infos = [s.info() for s in streams]
+        sent = sum(s.delivered(info) for s, info in zip(streams, infos))
+        infos = [info for info in infos if info]
+        retrans = sum(info['total_retrans'] for info in infos)
+        rtt = sum(info['rtt_ms'] for info in infos) / len(infos) if infos else 0.0
+        cwnd = sum(info['snd_cwnd'] for info in infos)
+        print(f"📈 {now - start_time:6.1f} s | {(sent - previous_bytes) * 8 / report_interval / 1e6:10.2f} Mbps "
+              f"| retrans: {retrans - previous_retrans} | RTT: {rtt:.2f} ms | cwnd: {cwnd}")
+        previous_bytes = sent
+        previous_retrans = retrans
+        next_report += report_interval
+
+    for thread in threads:
+        thread.join()
+    # Tunggu sebentar sampai ekor data di send buffer di-ACK receiver
+    wait_until = time.time() + 2.0
+    while time.time() < wait_until and any(s.delivered() < s.sent for s in streams if not s.error):
+        time.sleep(0.01)
+    elapsed = time.time() - start_time
+
+    print("\n===== Per stream =====")
+    print("Stream\tSource IP\tBytes\tGoodput (Mbps)\tRetrans\tRTT (ms)")
+    per_stream = []
+    for s in streams:
+        info = s.info()
+        delivered = s.delivered(info)
+        info = info or {'total_retrans': 0, 'rtt_ms': 0.0}
+        per_stream.append({'source_ip': s.source_ip, 'bytes': delivered, 'sent': s.sent,
+                           'retrans': info['total_retrans'], 'rtt_ms': info['rtt_ms'], 'error': s.error})
+        print(f"{s.index}\t{s.source_ip or '-'}\t{delivered}\t{delivered * 8 / elapsed / 1e6:.2f}\t"
+              f"{info['total_retrans']}\t{info['rtt_ms']:.2f}" + (f"\t⚠️ {s.error}" if s.error else ""))
+        s.close()
+    payload.close()
+
+    total = sum(s['bytes'] for s in per_stream)
+    retrans = sum(s['retrans'] for s in per_stream)
+    print(f"\n✅ {total / 1e6:.2f} MB dalam {elapsed:.2f} detik")
+    print(f"📊 Goodput: {total * 8 / elapsed / 1e6:.2f} Mbps | Total retrans: {retrans} segmen")
+    return {'bytes': total, 'elapsed': elapsed, 'retrans': retrans, 'streams': per_stream}
+
+def run_tcp_sink(bind_ip="0.0.0.0", bind_port=5201, duration=None, buffer_size=1024 * 1024, report_interval=1.0):
+    """
+    Sink for run_tcp_bulk: accepts any number of streams and discards their data.
+
+    :param bind_ip: Local IP to listen on
+    :param bind_port: Local TCP port
+    :param duration: Stop after this many seconds (None = until Ctrl+C)
+    :param buffer_size: recv_into() buffer per connection
+    :param report_interval: Seconds between goodput lines
+    """
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind((bind_ip, bind_port))
+    server.listen(128)
+    server.settimeout(0.2)
+
+    # Hanya thread ini yang menambah key; thread drain cuma menambah nilai milik koneksinya
+    received = {}
+
+    def drain(conn, peer):
+        buffer = bytearray(buffer_size)
+        with conn:
+            while True:
+                try:
+                    n = conn.recv_into(buffer)
+                except OSError:
+                    break
+                if not n:
+                    break
+                received[peer] += n
+
+    print(f"👂 Sink TCP di {bind_ip}:{bind_port}")
+    start_time = time.time()
+    next_report = start_time + report_interval
+    previous_bytes = 0
+    try:
+        while duration is None or time.time() - start_time < duration:
+            try:
+                conn, peer = server.accept()
+                received[peer] = 0
+                threading.Thread(target=drain, args=(conn, peer), daemon=True).start()
+            except socket.timeout:
+                pass
+            now = time.time()
+            if now >= next_report:
+                total = sum(received.values())
+                print(f"📥 {now - start_time:6.1f} s | {(total - previous_bytes) * 8 / report_interval / 1e6:10.2f} Mbps "
+                      f"| koneksi: {len(received)}")
+                previous_bytes = total
+                next_report += report_interval
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+    total = sum(received.values())
+    print(f"\n✅ Diterima {total / 1e6:.2f} MB dari {len(received)} stream")
+    return received
+
+def main():
+    print("\n===== TCP Bulk Throughput =====")
+    mode = input("Mode (send/sink) [send]: ").strip().lower() or "send"
+    port = int(input("Port TCP [5201]: ") or 5201)
+    if mode == "sink":
+        run_tcp_sink(bind_port=port)
+        return
+
+    target_ip = input("IP tujuan (sink): ").strip()
+    source_ips = input("Masukkan Source IPs (pisahkan dengan koma, contoh: 192.168.1.1,192.168.1.2): ").split(',')
+    streams_per_ip = int(input("Jumlah stream paralel per source IP [1]: ") or 1)
+    size_mb = input("Ukuran transfer per stream dalam MB (kosong = berdasarkan durasi): ").strip()
+    transfer_bytes = int(float(size_mb) * 1e6) if size_mb else None
+    duration = None if transfer_bytes else float(input("Durasi (detik) [10]: ") or 10)
+    run_tcp_bulk(target_ip, port, source_ips, streams_per_ip, duration, transfer_bytes)
+
+if __name__ == "__main__":
+    main()
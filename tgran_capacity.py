@@ -0,0 +1,225 @@
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from tgran_scheduler import ArrivalScheduler
+from tgran_sampling import RequestSchedule, spawn_seeds
+from tgran_stats import TrafficStats
+from tgran_scenario import FLOW_SCRIPTS, load_script, install_log_writers, read_urls
+
+LOAD_MODES = ('open', 'closed')
+SEARCH_MODES = ('step', 'binary')
+
+class CapacityProbe:
+    """
+    Runs fixed-length load steps against one set of source IPs and judges them against an SLO.
+
+    In 'open' mode the level is the offered rate (requests/s, open-loop arrivals like
+    generate_traffic); in 'closed' mode it is the number of concurrent clients, each
+    sending its next request as soon as the previous one finished. A step passes when
+    p99 RTT <= ``slo_ms``, the error rate <= ``max_error`` and, in open mode, at least
+    ``min_goodput`` of the offered requests completed within the step (otherwise
+    requests are queueing inside the generator and RTT alone would look fine).
+
+    :param kind: 'http' (tgran-http.py) or 'web' (tgran-tcp.py)
+    :param urls: URL list ordered by Zipf rank
+    :param probabilities: Zipf-Mandelbrot probabilities over ``urls``
+    :param source_ips: Source IPs used together in every step
+    :param verbose: Let the script print every request (off by default, printing would slow the steps down)
+    """
+
+    def __init__(self, kind, urls, probabilities, source_ips, mode='open', step_duration=10.0, slo_ms=200.0,
+                 max_error=0.01, min_goodput=0.95, max_workers=500, pause=1.0, seed=None, pool_size=10,
+                 verify=True, streaming=False, verbose=False):
+        if mode not in LOAD_MODES:
+            raise ValueError(f"Unknown load mode {mode!r}, pilih salah satu dari {LOAD_MODES}")
+        module = load_script(FLOW_SCRIPTS[kind])
+        module.VERBOSE = verbose
+        self.columns = module.LOG_COLUMNS
+        self.request = partial(module.make_request, streaming=streaming) if kind == 'web' else module.make_request
+        self.sessions, _ = module.make_sessions(source_ips, max(pool_size, 1), verify)
+        self.urls = urls
+        self.probabilities = probabilities
+        self.mode = mode
+        self.step_duration = step_duration
+        self.slo_ms = slo_ms
+        self.max_error = max_error
+        self.min_goodput = min_goodput
+        self.max_workers = max_workers
+        self.pause = pause
+        self.seeds = spawn_seeds(seed, 1)[0]
+        self.steps = []
+
+    def _open_step(self, rate, results, seed):
+        num_requests = max(1, int(rate * self.step_duration))
+        schedule_seed, arrival_seed = spawn_seeds(seed, 2)
+        schedule = RequestSchedule(self.probabilities, len(self.sessions), num_requests, schedule_seed)
+        scheduler = ArrivalScheduler(num_requests, rate, 'poisson', seed=arrival_seed)
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        for _, (url_idx, source_idx) in zip(scheduler, schedule):
+            executor.submit(self.request, self.urls[url_idx], results, self.sessions[source_idx])
+        # Yang selesai sebelum step berakhir; sisanya berarti antre di generator
+        in_time = len(results)
+        executor.shutdown(wait=True)
+        return num_requests, in_time
+
+    def _closed_step(self, clients, results, seed):
+        stop = time.perf_counter() + self.step_duration
+
+        def client(client_seed):
+            for url_idx, source_idx in RequestSchedule(self.probabilities, len(self.sessions), None, client_seed):
+                if time.perf_counter() >= stop:
+                    return
+                self.request(self.urls[url_idx], results, self.sessions[source_idx])
+
+        threads = [threading.Thread(target=client, args=(s,), daemon=True) for s in spawn_seeds(seed, int(clients))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return len(results), len(results)
+
+    def measure(self, level):
+        """Runs one step at ``level`` and returns its summary dict (also kept in ``steps``)."""
+        results = TrafficStats(self.columns)
+        seed = self.seeds.spawn(1)[0]
+        start = time.perf_counter()
+        if self.mode == 'open':
+            offered, in_time = self._open_step(level, results, seed)
+        else:
+            offered, in_time = self._closed_step(level, results, seed)
+        elapsed = max(time.perf_counter() - start, self.step_duration)
+
+        count = len(results)
+        p99 = results.overall['rtt'].percentile(99)
+        error_rate = results.errors / count if count else 1.0
+        goodput = in_time / offered if offered else 0.0
+        passed = (count > 0 and p99 <= self.slo_ms and error_rate <= self.max_error
+                  and (self.mode == 'closed' or goodput >= self.min_goodput))
+        step = {
+            'level': level, 'requests': count, 'throughput_rps': (count - results.errors) / elapsed,
+            'p50_ms': results.overall['rtt'].percentile(50), 'p99_ms': p99, 'error_rate': error_rate,
+            'goodput': goodput, 'passed': passed,
+        }
+        self.steps.append(step)
+        unit = "rps" if self.mode == 'open' else "klien"
+        print(f"{'✅' if passed else '❌'} {level:g} {unit} | throughput: {step['throughput_rps']:.1f} rps "
+              f"| p50: {step['p50_ms']:.1f} ms | p99: {p99:.1f} ms | error: {error_rate * 100:.2f}% "
+              f"| selesai tepat waktu: {goodput * 100:.1f}%")
+        time.sleep(self.pause)
+        return step
+
+    def step_search(self, start, step, maximum):
+        """Raises the level by ``step`` until a step fails; returns the last passing step."""
+        best = None
+        level = start
+        while level <= maximum:
+            result = self.measure(level)
+            if not result['passed']:
+                break
+            best = result
+            level += step
+        return best
+
+    def binary_search(self, start, maximum, tolerance=0.05):
+        """
+        Doubles the level from ``start`` until a step fails, then bisects between the
+        last pass and the first failure until they are within ``tolerance`` of each other.
+        """
+        best = None
+        low, high = 0, None
+        level = start
+        while level <= maximum:
+            result = self.measure(level)
+            if not result['passed']:
+                high = level
+                break
+            best, low = result, level
+            level *= 2
+        if high is None:
+            return best
+        while high - low > max(tolerance * max(low, 1), 1 if self.mode == 'closed' else 0):
+            level = (low + high) / 2
+            if self.mode == 'closed':
+                level = int(level)
+                if level in (low, high):
+                    break
+            result = self.measure(level)
+            if result['passed']:
+                best, low = result, level
+            else:
+                high = level
+        return best
+
+def find_capacity(kind, urls, probabilities, source_ips, search='binary', start=10, step=10, maximum=100000,
+                  per_ip=True, **options):
+    """
+    Finds the highest load each UE (source IP) sustains within the SLO.
+
+    With ``per_ip`` every source IP is searched on its own, one after the other, so
+    each UE's knee is measured without the others competing; otherwise all IPs are
+    loaded together. ``options`` go to CapacityProbe (mode, step_duration, slo_ms, ...).
+    """
+    if search not in SEARCH_MODES:
+        raise ValueError(f"Unknown search {search!r}, pilih salah satu dari {SEARCH_MODES}")
+    groups = [[ip] for ip in source_ips] if per_ip else [list(source_ips)]
+    capacity = {}
+    for ips in groups:
+        label = ','.join(ips)
+        print(f"\n===== Mencari kapasitas untuk {label} =====")
+        probe = CapacityProbe(kind, urls, probabilities, ips, **options)
+        if search == 'step':
+            best = probe.step_search(start, step, maximum)
+        else:
+            best = probe.binary_search(start, maximum)
+        capacity[label] = best
+
+    slo = options.get('slo_ms', 200.0)
+    print(f"\n===== Kapasitas maksimum (p99 <= {slo:g} ms, error <= {options.get('max_error', 0.01) * 100:g}%) =====")
+    print("Source IP\tLevel\tMax RPS\tp99 (ms)\tError (%)")
+    for label, best in capacity.items():
+        if best is None:
+            print(f"{label}\t-\t-\t-\t- (level awal sudah melanggar SLO)")
+        else:
+            print(f"{label}\t{best['level']:g}\t{best['throughput_rps']:.1f}\t{best['p99_ms']:.1f}\t{best['error_rate'] * 100:.2f}")
+    return capacity
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cari RPS maksimum yang masih memenuhi SLO latency per source IP")
+    parser.add_argument('--type', default='http', choices=sorted(FLOW_SCRIPTS), help="http (tgran-http) atau web (tgran-tcp)")
+    parser.add_argument('--urls', default='url_http.csv', help="File CSV dengan kolom URL")
+    parser.add_argument('--num-urls', type=int, help="Jumlah URL yang dipakai")
+    parser.add_argument('--zipf', type=float, nargs=2, default=(1.0, 1.0), metavar=('Q', 'S'))
+    parser.add_argument('--source-ips', required=True, help="Source IP, pisahkan dengan koma")
+    parser.add_argument('--together', action='store_true', help="Uji semua source IP bersama, bukan per IP")
+    parser.add_argument('--mode', default='open', choices=LOAD_MODES, help="open = rate (rps), closed = jumlah klien")
+    parser.add_argument('--search', default='binary', choices=SEARCH_MODES)
+    parser.add_argument('--start', type=float, default=10, help="Level awal")
+    parser.add_argument('--step', type=float, default=10, help="Kenaikan level untuk --search step")
+    parser.add_argument('--max', type=float, default=100000, help="Level maksimum")
+    parser.add_argument('--step-duration', type=float, default=10, help="Lama tiap step (detik)")
+    parser.add_argument('--slo-ms', type=float, default=200, help="Batas p99 RTT (ms)")
+    parser.add_argument('--max-error', type=float, default=0.01, help="Batas error rate (0.01 = 1%%)")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--verbose', action='store_true', help="Tampilkan setiap request")
+    args = parser.parse_args(argv)
+
+    module = load_script(FLOW_SCRIPTS[args.type])
+    writers = install_log_writers([args.type], 'capacity')
+    urls = read_urls(args.urls, args.num_urls)
+    probabilities = module.zipf_mandelbrot(len(urls), *args.zipf)
+    start = int(args.start) if args.mode == 'closed' else args.start
+    step = int(args.step) if args.mode == 'closed' else args.step
+    try:
+        find_capacity(args.type, urls, probabilities, [ip.strip() for ip in args.source_ips.split(',')], args.search,
+                      start, step, args.max, not args.together, mode=args.mode, step_duration=args.step_duration,
+                      slo_ms=args.slo_ms, max_error=args.max_error, seed=args.seed,
+                      verbose=args.verbose)
+    finally:
+        for writer in writers:
+            writer.close()
+
+if __name__ == "__main__":
+    main()
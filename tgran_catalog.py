@@ -0,0 +1,197 @@
+import csv
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+
+import numpy as np
+
+# Header file .tgc: magic, versi, jumlah URL, posisi tabel offset, posisi tabel ukuran
+TGC_MAGIC = b'TGC1'
+TGC_HEADER = struct.Struct('<4sIQQQ')
+DEFAULT_TEMPLATE = "http://{ip}/index{n}.html"
+SIZE_DISTRIBUTIONS = ('fixed', 'lognormal', 'pareto')
+
+def parse_size_spec(spec):
+    """
+    Parses an object-size spec: ``fixed:N``, ``lognormal:MEDIAN,SIGMA`` or ``pareto:MIN,ALPHA``
+    (bytes). Returns ``(name, params)``.
+    """
+    name, _, args = spec.partition(':')
+    if name not in SIZE_DISTRIBUTIONS:
+        raise ValueError(f"Unknown size distribution {name!r}, pilih salah satu dari {SIZE_DISTRIBUTIONS}")
+    return name, [float(a) for a in args.split(',')] if args else []
+
+def draw_sizes(rng, spec, n):
+    name, params = parse_size_spec(spec)
+    if name == 'fixed':
+        sizes = np.full(n, params[0] if params else 2000)
+    elif name == 'lognormal':
+        median, sigma = (params + [20000, 1.0][len(params):])[:2]
+        sizes = rng.lognormal(np.log(median), sigma, n)
+    else:
+        minimum, alpha = (params + [1000, 1.2][len(params):])[:2]
+        sizes = minimum * (1 + rng.pareto(alpha, n))
+    return np.maximum(sizes, 1).astype(np.uint64)
+
+def iter_catalog(count, templates=(DEFAULT_TEMPLATE,), weights=None, ip='127.0.0.1', size_spec='fixed:2000', seed=None,
+                 chunk_size=65536):
+    """
+    Yields ``(urls, sizes)`` chunks of a generated catalog, so any ``count`` fits in memory.
+
+    Every URL comes from one of ``templates`` (picked round-robin, or randomly by
+    ``weights``), formatted with ``{i}`` (0-based index), ``{n}`` (1-based), ``{ip}`` and
+    ``{size}``, the object size drawn from ``size_spec``; e.g.
+    ``http://{ip}/obj/{i}?size={size}`` for the tgran_bench stand-in server.
+    """
+    rng = np.random.default_rng(seed)
+    p = None if weights is None else np.asarray(weights, dtype=np.float64) / np.sum(weights)
+    for start in range(0, count, chunk_size):
+        n = min(chunk_size, count - start)
+        sizes = draw_sizes(rng, size_spec, n)
+        if p is None:
+            picks = (np.arange(start, start + n) % len(templates)).tolist()
+        else:
+            picks = rng.choice(len(templates), n, p=p).tolist()
+        urls = [templates[t].format(i=i, n=i + 1, ip=ip, size=size)
+                for i, t, size in zip(range(start, start + n), picks, sizes.tolist())]
+        yield urls, sizes
+
+def write_csv(path, chunks):
+    """Writes catalog chunks as CSV with the ``,URL`` layout of url_http.csv plus a Size column."""
+    index = 0
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['', 'URL', 'Size'])
+        for urls, sizes in chunks:
+            writer.writerows(zip(range(index, index + len(urls)), urls, sizes.tolist()))
+            index += len(urls)
+    return index
+
+def write_tgc(path, chunks):
+    """
+    Writes catalog chunks in the compact .tgc format: header, URL blob, then uint64
+    offset (count + 1) and size (count) tables. The tables are spooled to temporary
+    files while the blob is written, so memory stays at one chunk.
+    """
+    count = 0
+    position = 0
+    with open(path, 'wb') as file, tempfile.TemporaryFile() as offsets, tempfile.TemporaryFile() as sizes_file:
+        file.write(TGC_HEADER.pack(TGC_MAGIC, 1, 0, 0, 0))
+        for urls, sizes in chunks:
+            encoded = [url.encode() for url in urls]
+            lengths = np.fromiter((len(e) for e in encoded), dtype=np.uint64, count=len(encoded))
+            starts = position + np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.uint64)
+            offsets.write(starts.tobytes())
+            sizes_file.write(np.asarray(sizes, dtype=np.uint64).tobytes())
+            file.write(b''.join(encoded))
+            position += int(lengths.sum())
+            count += len(encoded)
+        offsets.write(np.uint64(position).tobytes())
+
+        # Tabel dimulai di posisi kelipatan 8 supaya bisa di-memmap sebagai uint64
+        file.write(b'\0' * (-file.tell() % 8))
+        offsets_pos = file.tell()
+        offsets.seek(0)
+        shutil.copyfileobj(offsets, file)
+        sizes_pos = file.tell()
+        sizes_file.seek(0)
+        shutil.copyfileobj(sizes_file, file)
+        file.seek(0)
+        file.write(TGC_HEADER.pack(TGC_MAGIC, 1, count, offsets_pos, sizes_pos))
+    return count
+
+def generate_catalog(path, count, templates=(DEFAULT_TEMPLATE,), weights=None, ip='127.0.0.1', size_spec='fixed:2000',
+                     seed=None):
+    """Streams a generated catalog to ``path`` (.tgc = compact format, otherwise CSV). Returns the URL count."""
+    chunks = iter_catalog(count, templates, weights, ip, size_spec, seed)
+    return write_tgc(path, chunks) if path.endswith('.tgc') else write_csv(path, chunks)
+
+class Catalog:
+    """
+    Read-only URL list backed by a memory-mapped .tgc file.
+
+    Nothing is decoded up front: ``catalog[i]`` slices one URL out of the blob, so
+    opening a catalog of millions of URLs is instant and the pages are shared by all
+    worker processes through the page cache. Supports len(), iteration, ``[:n]``
+    (a lazy view of the first n URLs) and pickling by path.
+
+    :param path: .tgc file written by write_tgc
+    :param limit: Only expose the first ``limit`` URLs
+    """
+
+    def __init__(self, path, limit=None):
+        self.path = path
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, offsets_pos, sizes_pos = TGC_HEADER.unpack_from(self._map)
+        if magic != TGC_MAGIC:
+            raise ValueError(f"{path} bukan file catalog .tgc")
+        self._count = count
+        self._offsets = np.frombuffer(self._map, dtype=np.uint64, count=count + 1, offset=offsets_pos)
+        self.sizes = np.frombuffer(self._map, dtype=np.uint64, count=count, offset=sizes_pos)
+        self._blob_start = TGC_HEADER.size
+        self._len = count if limit is None else min(limit, count)
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._len)
+            if start != 0 or step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return Catalog(self.path, stop)
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("catalog index out of range")
+        start = self._blob_start + int(self._offsets[index])
+        end = self._blob_start + int(self._offsets[index + 1])
+        return self._map[start:end].decode()
+
+    def __iter__(self):
+        for i in range(self._len):
+            yield self[i]
+
+    def size(self, index):
+        """Object size recorded for URL ``index``."""
+        return int(self.sizes[index])
+
+    def __getstate__(self):
+        return {'path': self.path, 'limit': self._len}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'], state['limit'])
+
+def open_catalog(path, num_urls=None):
+    """
+    URLs of a catalog file: a lazy Catalog for .tgc, a list from the ``URL`` column
+    (csv module, no pandas) for anything else.
+    """
+    if path.endswith('.tgc'):
+        return Catalog(path, num_urls)
+    with open(path, newline='') as file:
+        urls = [row['URL'] for row in csv.DictReader(file)]
+    return urls[:num_urls] if num_urls else urls
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Buat catalog URL besar secara streaming (.csv atau .tgc)")
+    parser.add_argument('output', help="File tujuan (.tgc = format ringkas, lainnya CSV)")
+    parser.add_argument('--count', type=int, default=100, help="Jumlah URL")
+    parser.add_argument('--ip', default='127.0.0.1', help="Nilai {ip} di template")
+    parser.add_argument('--template', action='append', help=f"Template URL (boleh diulang) [{DEFAULT_TEMPLATE}]")
+    parser.add_argument('--weights', help="Bobot tiap template, pisahkan dengan koma")
+    parser.add_argument('--sizes', default='fixed:2000', help="fixed:N, lognormal:MEDIAN,SIGMA atau pareto:MIN,ALPHA")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    templates = args.template or [DEFAULT_TEMPLATE]
+    weights = [float(w) for w in args.weights.split(',')] if args.weights else None
+    count = generate_catalog(args.output, args.count, templates, weights, args.ip, args.sizes, args.seed)
+    print(f"File '{args.output}' berhasil dibuat: {count} URL ({os.path.getsize(args.output) / 1e6:.1f} MB)")
+
+if __name__ == "__main__":
+    main()
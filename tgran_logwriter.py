@@ -0,0 +1,237 @@
+import io
+import os
+import queue
+import struct
+import threading
+import time
+from datetime import datetime
+import numpy as np
+
+LOG_FORMATS = ('tsv', 'columnar')
+CHUNK_MAGIC = b'TGLC'
+_STOP = object()
+
+def encode_chunk(columns, rows):
+    """
+    Encodes a batch of log rows as one self-contained columnar chunk.
+
+    Numeric columns become float64, datetime columns float64 epoch seconds, anything
+    else is dictionary-encoded (uint32 codes + unique values). Because every chunk
+    carries its own dictionary, chunks from several processes can be appended to
+    one file without coordination.
+    """
+    arrays = {'columns': np.array(columns)}
+    kinds = []
+    for i in range(len(columns)):
+        values = [row[i] if i < len(row) else None for row in rows]
+        if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+            arrays[f'c{i}'] = np.array(values, dtype=np.float64)
+            kinds.append('num')
+        elif all(isinstance(v, datetime) for v in values):
+            arrays[f'c{i}'] = np.array([v.timestamp() for v in values], dtype=np.float64)
+            kinds.append('time')
+        else:
+            strings = np.array(['' if v is None else str(v) for v in values])
+            uniques, codes = np.unique(strings, return_inverse=True)
+            arrays[f'c{i}_values'] = uniques
+            arrays[f'c{i}_codes'] = codes.astype(np.uint32)
+            kinds.append('str')
+    arrays['kinds'] = np.array(kinds)
+
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    payload = buffer.getvalue()
+    return CHUNK_MAGIC + struct.pack('<Q', len(payload)) + payload
+
+def chunk_offsets(filename):
+    """File offsets of every chunk of a columnar log (only the chunk headers are read)."""
+    offsets = []
+    with open(filename, 'rb') as file:
+        end = os.fstat(file.fileno()).st_size
+        position = 0
+        while position + 12 <= end:
+            file.seek(position)
+            header = file.read(12)
+            if header[:4] != CHUNK_MAGIC:
+                raise ValueError(f"{filename}: chunk header rusak")
+            offsets.append(position)
+            position += 12 + struct.unpack('<Q', header[4:])[0]
+    return offsets
+
+def read_chunks(filename, start=0, stop=None):
+    """
+    Yields one ``{column: array}`` dict per chunk of a columnar log; string columns stay dictionary-encoded as (codes, values).
+
+    :param start: Offset of the first chunk to read (see chunk_offsets)
+    :param stop: Stop at the chunk starting at this offset (None = end of file)
+    """
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        while stop is None or file.tell() < stop:
+            header = file.read(12)
+            if len(header) < 12:
+                return
+            if header[:4] != CHUNK_MAGIC:
+                raise ValueError(f"{filename}: chunk header rusak")
+            (size,) = struct.unpack('<Q', header[4:])
+            with np.load(io.BytesIO(file.read(size))) as data:
+                chunk = {}
+                for i, (name, kind) in enumerate(zip(data['columns'].tolist(), data['kinds'].tolist())):
+                    if kind == 'str':
+                        chunk[name] = (data[f'c{i}_codes'], data[f'c{i}_values'])
+                    else:
+                        chunk[name] = data[f'c{i}']
+                yield chunk
+
+class LogWriter:
+    """
+    Background writer that request threads hand log rows to through a bounded queue.
+
+    A single thread collects rows until it has ``batch_size`` of them or ``linger``
+    seconds passed since the first one, and writes them with one write() call, either
+    as TSV lines (same layout as log_to_log) or as one columnar chunk (see
+    encode_chunk). The log is lossy by default: when the queue is full, write() waits
+    at most ``block_timeout`` seconds (0 = not at all) and then drops the row, so a
+    slow disk never stalls the request threads. Drops are counted and warned about
+    while the run is going on, not only at close(). A failed write is recorded and
+    re-raised from flush()/close(); the thread keeps draining so nothing blocks.
+    After a fork the child lazily starts its own queue and thread and appends to the
+    same file; a pickled writer carries only its configuration and starts fresh.
+
+    :param filename: Output file, opened in append mode
+    :param columns: Column names of the rows (the script's LOG_COLUMNS)
+    :param fmt: 'tsv' or 'columnar'
+    :param batch_size: Maximum rows per write
+    :param max_pending: Queue bound in rows
+    :param linger: Seconds to wait for more rows before writing a partial batch
+    :param block_timeout: Seconds write() waits for room in a full queue before dropping
+    :param warn_interval: Minimum seconds between drop warnings
+    """
+
+    def __init__(self, filename, columns, fmt='tsv', batch_size=4096, max_pending=65536, linger=1.0,
+                 block_timeout=0.0, warn_interval=5.0):
+        if fmt not in LOG_FORMATS:
+            raise ValueError(f"Unknown log format {fmt!r}, pilih salah satu dari {LOG_FORMATS}")
+        self.filename = filename
+        self.columns = list(columns)
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.linger = linger
+        self.block_timeout = block_timeout
+        self.warn_interval = warn_interval
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._start()
+
+    def __getstate__(self):
+        # Hanya konfigurasi; worker (run_sharded) membuat queue dan thread sendiri
+        return {'filename': self.filename, 'columns': self.columns, 'fmt': self.fmt, 'batch_size': self.batch_size,
+                'max_pending': self.max_pending, 'linger': self.linger, 'block_timeout': self.block_timeout,
+                'warn_interval': self.warn_interval}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _start(self):
+        self._pid = os.getpid()
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.error = None
+        self._warned = 0
+        self._warned_at = 0.0
+        self._drop_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=self.max_pending)
+        self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self._thread.start()
+
+    def _encode(self, rows):
+        if self.fmt == 'columnar':
+            return encode_chunk(self.columns, rows)
+        return ''.join('\t'.join(map(str, row)) + '\n' for row in rows).encode()
+
+    def _next_batch(self):
+        """Waits for rows until batch_size or the linger deadline; returns ``(batch, stopping)``."""
+        item = self._queue.get()
+        batch = []
+        deadline = time.monotonic() + self.linger
+        while True:
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                return batch, False
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                return batch, False
+
+    def _warn_drops(self):
+        now = time.monotonic()
+        if self.dropped > self._warned and now - self._warned_at >= self.warn_interval:
+            print(f"⚠️ {self.dropped - self._warned} baris log dibuang karena buffer penuh ({self.filename}, "
+                  f"total {self.dropped})", flush=True)
+            self._warned = self.dropped
+            self._warned_at = now
+
+    def _run(self):
+        try:
+            file = open(self.filename, 'ab', buffering=0)
+        except OSError as e:
+            self.error = e
+            file = None
+        try:
+            stopping = False
+            while not stopping:
+                batch, stopping = self._next_batch()
+                if batch:
+                    try:
+                        if file is None:
+                            raise self.error
+                        file.write(self._encode(batch))
+                        self.written += len(batch)
+                    except Exception as e:
+                        # Thread tetap hidup supaya flush()/close() tidak menggantung; error dilempar di sana
+                        self.error = e
+                        self.failed += len(batch)
+                self._warn_drops()
+                for _ in range(len(batch) + stopping):
+                    self._queue.task_done()
+        finally:
+            if file is not None:
+                file.close()
+
+    def _raise_error(self):
+        if self.error is not None:
+            raise OSError(f"Log {self.filename}: {self.failed} baris gagal ditulis ({self.error})") from self.error
+
+    def write(self, row):
+        if os.getpid() != self._pid:
+            with self._start_lock:
+                if os.getpid() != self._pid:
+                    self._start()
+        try:
+            if self.block_timeout > 0:
+                self._queue.put(row, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+
+    def flush(self):
+        """Blocks until every queued row of this process has been written; raises if a write failed."""
+        if os.getpid() == self._pid:
+            self._queue.join()
+            self._raise_error()
+
+    def close(self):
+        if os.getpid() != self._pid or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self.dropped:
+            print(f"⚠️ {self.dropped} baris log dibuang karena buffer penuh ({self.filename})")
+        self._raise_error()
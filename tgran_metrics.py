@@ -0,0 +1,293 @@
+import http.server
+import os
+import threading
+import time
+
+from tgran_stats import LatencyHistogram
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+class _Shard:
+    # Hanya ditulis oleh satu thread; pembaca cukup menyalin isinya
+    __slots__ = ('slots', 'totals', 'started')
+
+    def __init__(self):
+        self.slots = {}
+        self.totals = {}
+        self.started = {}
+
+def _copy(hist):
+    # Salinan dict dibuat dalam satu langkah (GIL), aman walaupun pemiliknya masih menulis
+    snapshot = LatencyHistogram(hist.precision, hist.lowest)
+    snapshot.counts = dict(hist.counts)
+    snapshot.count, snapshot.total, snapshot.min, snapshot.max = hist.count, hist.total, hist.min, hist.max
+    return snapshot
+
+class LiveMetrics:
+    """
+    Sliding-window request metrics of a running generator, per (flow, source IP).
+
+    Every thread writes into its own shard (count, errors, bytes and a latency
+    histogram per ``resolution``-second slot), so recording a request takes no lock;
+    the only lock is taken once per thread when its shard is created. Readers merge
+    the completed slots of all shards inside ``window`` seconds. The numbers are
+    served in Prometheus text format and/or printed as one summary line per
+    ``summary_interval`` seconds, see start().
+
+    :param window: Length of the sliding window in seconds
+    :param resolution: Slot length in seconds
+    :param port: Port of the /metrics endpoint (None = no endpoint); the next free port is
+        taken when it is in use, e.g. by another worker process
+    :param summary_interval: Seconds between summary lines (None = no summary line)
+    :param bind_ip: Address of the /metrics endpoint (local only by default; '0.0.0.0' for a remote scraper)
+    """
+
+    def __init__(self, window=10.0, resolution=1.0, port=None, summary_interval=None, bind_ip='127.0.0.1'):
+        self.window = window
+        self.resolution = resolution
+        self.port = port
+        self.summary_interval = summary_interval
+        self.bind_ip = bind_ip
+        self._slots = max(1, int(round(window / resolution)))
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+        self._pid = None
+        self._server = None
+        self._stop = threading.Event()
+        self._printer = None
+        self.start_time = time.time()
+
+    def __getstate__(self):
+        # Hanya konfigurasi; tiap worker punya shard, endpoint dan printer sendiri
+        return {'window': self.window, 'resolution': self.resolution, 'port': self.port,
+                'summary_interval': self.summary_interval, 'bind_ip': self.bind_ip}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def begin(self, flow, source_ip):
+        """Counts a request of ``flow`` from ``source_ip`` as in flight."""
+        shard = self._shard()
+        key = (flow, source_ip)
+        shard.started[key] = shard.started.get(key, 0) + 1
+
+    def record(self, flow, source_ip, rtt_ms, size_bytes=0, error=False):
+        """Records a finished request (and ends its in-flight count)."""
+        shard = self._shard()
+        key = (flow, source_ip)
+        slot = int(time.time() // self.resolution)
+        bucket = shard.slots.get(slot)
+        if bucket is None:
+            bucket = shard.slots[slot] = {}
+            for old in [s for s in shard.slots if s <= slot - self._slots - 1]:
+                del shard.slots[old]
+        stats = bucket.get(key)
+        if stats is None:
+            stats = bucket[key] = [0, 0, 0, LatencyHistogram()]
+        stats[0] += 1
+        stats[1] += error
+        stats[2] += size_bytes
+        stats[3].record(rtt_ms)
+        totals = shard.totals.get(key)
+        if totals is None:
+            totals = shard.totals[key] = [0, 0, 0]
+        totals[0] += 1
+        totals[1] += error
+        totals[2] += size_bytes
+
+    def flow(self, name, columns):
+        """View that records the log rows of one script (see FlowMetrics)."""
+        return FlowMetrics(self, name, columns)
+
+    def snapshot(self):
+        """
+        Returns ``{(flow, source_ip): stats}`` with window rates (rps, error_rate,
+        bytes_per_second), in_flight, the window latency histogram and run totals.
+        """
+        now_slot = int(time.time() // self.resolution)
+        first = now_slot - self._slots
+        # Slot pertama bisa terpotong oleh waktu start, jadi rentang dihitung dari start_time
+        span = now_slot * self.resolution - max(first * self.resolution, self.start_time)
+        with self._lock:
+            shards = list(self._shards)
+
+        result = {}
+        def entry(key):
+            if key not in result:
+                result[key] = {'count': 0, 'errors': 0, 'bytes': 0, 'latency': LatencyHistogram(), 'in_flight': 0,
+                               'total': 0, 'errors_total': 0, 'bytes_total': 0}
+            return result[key]
+
+        for shard in shards:
+            for slot, bucket in list(shard.slots.items()):
+                if not first <= slot < now_slot:
+                    continue
+                for key, (count, errors, size, hist) in list(bucket.items()):
+                    e = entry(key)
+                    e['count'] += count
+                    e['errors'] += errors
+                    e['bytes'] += size
+                    e['latency'].merge(_copy(hist))
+            for key, (count, errors, size) in list(shard.totals.items()):
+                e = entry(key)
+                e['total'] += count
+                e['errors_total'] += errors
+                e['bytes_total'] += size
+                e['in_flight'] -= count
+            for key, started in list(shard.started.items()):
+                entry(key)['in_flight'] += started
+
+        for e in result.values():
+            e['rps'] = e['count'] / span if span > 0 else 0.0
+            e['error_rate'] = e['errors'] / e['count'] if e['count'] else 0.0
+            e['bytes_per_second'] = e['bytes'] / span if span > 0 else 0.0
+            e['in_flight'] = max(e['in_flight'], 0)
+        return result
+
+    def prometheus(self):
+        """All metrics in Prometheus text exposition format."""
+        snapshot = sorted(self.snapshot().items())
+        lines = []
+        def family(name, kind, help_text, value, quantiles=False):
+            lines.append(f"# HELP tgran_{name} {help_text}")
+            lines.append(f"# TYPE tgran_{name} {kind}")
+            for (flow, source_ip), e in snapshot:
+                labels = f'flow="{flow}",source_ip="{source_ip}"'
+                if quantiles:
+                    for q in QUANTILES:
+                        lines.append(f'tgran_{name}{{{labels},quantile="{q:g}"}} {e["latency"].percentile(q * 100):.3f}')
+                else:
+                    lines.append(f"tgran_{name}{{{labels}}} {value(e):.10g}")
+
+        family('requests_total', 'counter', "Requests finished", lambda e: e['total'])
+        family('errors_total', 'counter', "Requests failed (no response or status >= 400)", lambda e: e['errors_total'])
+        family('bytes_total', 'counter', "Bytes received", lambda e: e['bytes_total'])
+        family('in_flight', 'gauge', "Requests currently in flight", lambda e: e['in_flight'])
+        family('requests_per_second', 'gauge', f"Request rate over the last {self.window:g} s", lambda e: e['rps'])
+        family('error_ratio', 'gauge', f"Error ratio over the last {self.window:g} s", lambda e: e['error_rate'])
+        family('bytes_per_second', 'gauge', f"Receive rate over the last {self.window:g} s",
+               lambda e: e['bytes_per_second'])
+        family('latency_ms', 'gauge', f"Latency quantiles over the last {self.window:g} s", None, quantiles=True)
+        return '\n'.join(lines) + '\n'
+
+    def summary_line(self):
+        snapshot = self.snapshot().values()
+        latency = LatencyHistogram()
+        for e in snapshot:
+            latency.merge(e['latency'])
+        rps = sum(e['rps'] for e in snapshot)
+        count = sum(e['count'] for e in snapshot)
+        errors = sum(e['errors'] for e in snapshot)
+        return (f"📈 {time.time() - self.start_time:6.1f} s | {rps:8.1f} rps "
+                f"| error: {errors / count * 100 if count else 0.0:5.2f}% "
+                f"| in-flight: {sum(e['in_flight'] for e in snapshot):4d} "
+                f"| p50: {latency.percentile(50):7.1f} ms | p99: {latency.percentile(99):7.1f} ms "
+                f"| {sum(e['bytes_per_second'] for e in snapshot) / 1e6:.2f} MB/s")
+
+    def _serve(self):
+        metrics = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        for port in range(self.port, self.port + 64):
+            try:
+                server = http.server.ThreadingHTTPServer((self.bind_ip, port), Handler)
+                break
+            except OSError:
+                continue
+        else:
+            print(f"⚠️ Tidak ada port bebas untuk metrics mulai {self.port}")
+            return None
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"🔭 Metrics Prometheus di http://{self.bind_ip}:{server.server_address[1]}/metrics")
+        return server
+
+    def _print_summary(self):
+        while not self._stop.wait(self.summary_interval):
+            print(self.summary_line(), flush=True)
+
+    def start(self):
+        """
+        Starts the endpoint and summary printer of this process (once; a forked worker
+        process starts its own on the next free port).
+        """
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._stop = threading.Event()
+        self.start_time = time.time()
+        if self.port is not None:
+            self._server = self._serve()
+        if self.summary_interval:
+            self._printer = threading.Thread(target=self._print_summary, daemon=True)
+            self._printer.start()
+
+    def stop(self):
+        if self._pid != os.getpid():
+            return
+        self._pid = None
+        self._stop.set()
+        if self._printer is not None:
+            self._printer.join()
+            self._printer = None
+            print(self.summary_line())
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+class FlowMetrics:
+    """
+    LiveMetrics bound to one flow label and one script's LOG_COLUMNS.
+
+    record() takes the log row the script already builds; a row whose status is not
+    a number below 400 counts as an error.
+    """
+
+    def __init__(self, metrics, name, columns):
+        self.metrics = metrics
+        self.name = name
+        self._status_col = columns.index('Status Code')
+        self._rtt_col = columns.index('RTT (ms)')
+        self._source_col = columns.index('Source IP')
+        self._size_col = columns.index('Total Size (KB)') if 'Total Size (KB)' in columns else None
+
+    def start(self):
+        self.metrics.start()
+
+    def stop(self):
+        self.metrics.stop()
+
+    def begin(self, source_ip):
+        self.metrics.begin(self.name, source_ip)
+
+    def record(self, row, size_bytes=None):
+        """:param size_bytes: Body size; taken from the Total Size (KB) column when not given"""
+        if size_bytes is None:
+            size_bytes = int(row[self._size_col] * 1024) if self._size_col is not None else 0
+        status = row[self._status_col]
+        error = not isinstance(status, int) or status >= 400
+        self.metrics.record(self.name, row[self._source_col], row[self._rtt_col], size_bytes, error)
@@ -0,0 +1,116 @@
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from testingns import setns, measure_performance
+
+NETNS_DIR = '/var/run/netns'
+STAT_KEYS = ('rtt', 'total_size_kb', 'throughput_kbps', 'latency_ms')
+
+def list_namespaces(prefix='ue'):
+    """Returns the named network namespaces starting with ``prefix`` in natural order (ue2 before ue10)."""
+    try:
+        names = [n for n in os.listdir(NETNS_DIR) if n.startswith(prefix)]
+    except FileNotFoundError:
+        return []
+    return sorted(names, key=lambda n: [int(t) if t.isdigit() else t for t in re.split(r'(\d+)', n)])
+
+def run_ue(namespace, workload, args, num_iterations=1, interval=0):
+    """
+    Moves the calling thread into ``namespace`` and runs ``workload(*args)`` repeatedly.
+
+    setns(CLONE_NEWNET) only switches the calling thread, and threads it starts later
+    (e.g. the asset pool in measure_performance) inherit the namespace, so one OS
+    thread is enough to act as one UE. Only running sums are kept per UE.
+    """
+    setns(os.path.join(NETNS_DIR, namespace))
+    stats = {'namespace': namespace, 'ok': 0, 'failed': 0, 'max_rtt': 0.0}
+    sums = dict.fromkeys(STAT_KEYS, 0.0)
+
+    for i in range(num_iterations):
+        try:
+            result = workload(*args)
+        except Exception as e:
+            print(f"💥 [{namespace}] {e}")
+            result = None
+        if result is None:
+            stats['failed'] += 1
+        else:
+            stats['ok'] += 1
+            stats['max_rtt'] = max(stats['max_rtt'], result['rtt'])
+            for key in STAT_KEYS:
+                sums[key] += result[key]
+        if interval > 0 and i + 1 < num_iterations:
+            time.sleep(interval)
+
+    for key in STAT_KEYS:
+        stats[f'avg_{key}'] = sums[key] / stats['ok'] if stats['ok'] else 0.0
+    return stats
+
+def run_fleet(namespaces, workload=measure_performance, args=(), num_iterations=1, interval=0, mode='thread',
+              max_workers=None, stack_size=1024 * 1024):
+    """
+    Runs one workload per UE namespace and collects per-UE statistics centrally.
+
+    :param namespaces: Namespace names under /var/run/netns (see list_namespaces)
+    :param workload: Callable returning a dict like measure_performance(), or None on failure
+    :param args: Positional arguments for the workload
+    :param num_iterations: Times each UE runs the workload
+    :param interval: Pause between iterations of one UE (seconds)
+    :param mode: 'thread' (one pinned thread per UE, cheapest) or 'process'
+    :param max_workers: Concurrent UEs; defaults to all UEs in thread mode, os.cpu_count() in process mode
+    :param stack_size: Thread stack size in thread mode, kept small so hundreds of UEs fit on one host
+    """
+    if mode == 'process':
+        pool = ProcessPoolExecutor(max_workers=max_workers or os.cpu_count())
+    else:
+        previous = threading.stack_size(stack_size)
+        pool = ThreadPoolExecutor(max_workers=max_workers or len(namespaces), thread_name_prefix='ue')
+
+    per_ue = []
+    start = time.time()
+    with pool:
+        futures = {pool.submit(run_ue, ns, workload, args, num_iterations, interval): ns for ns in namespaces}
+        if mode != 'process':
+            threading.stack_size(previous)
+        for future in as_completed(futures):
+            try:
+                per_ue.append(future.result())
+            except OSError as e:
+                print(f"❌ UE {futures[future]} gagal: {e}")
+    elapsed = time.time() - start
+
+    per_ue.sort(key=lambda s: namespaces.index(s['namespace']))
+    return per_ue, elapsed
+
+def print_fleet_summary(per_ue, elapsed):
+    print("\n===== Statistik per UE =====")
+    print("UE\tOK\tGagal\tAvg RTT (ms)\tMax RTT (ms)\tAvg Size (KB)\tAvg Throughput (KB/s)")
+    for s in per_ue:
+        print(f"{s['namespace']}\t{s['ok']}\t{s['failed']}\t{s['avg_rtt']:.2f}\t{s['max_rtt']:.2f}"
+              f"\t{s['avg_total_size_kb']:.2f}\t{s['avg_throughput_kbps']:.2f}")
+
+    ok = sum(s['ok'] for s in per_ue)
+    failed = sum(s['failed'] for s in per_ue)
+    avg_rtt = sum(s['avg_rtt'] * s['ok'] for s in per_ue) / ok if ok else 0
+    print(f"\n📡 UE: {len(per_ue)} | ✅ OK: {ok} | ❌ Gagal: {failed} | ⚡ Rata-rata RTT: {avg_rtt:.2f} ms "
+          f"| ⏱️ Durasi: {elapsed:.2f} s")
+
+def main():
+    prefix = input("Prefix namespace UE [ue]: ").strip() or "ue"
+    namespaces = list_namespaces(prefix)
+    if not namespaces:
+        print(f"Tidak ada namespace dengan prefix '{prefix}' di {NETNS_DIR}!")
+        return
+    print(f"Ditemukan {len(namespaces)} namespace: {namespaces[0]} .. {namespaces[-1]}")
+
+    url = input("URL target [http://testasp.vulnweb.com/]: ").strip() or 'http://testasp.vulnweb.com/'
+    num_iterations = int(input("Jumlah request per UE [1]: ") or 1)
+    mode = input("Mode (thread/process) [thread]: ").strip().lower() or "thread"
+
+    per_ue, elapsed = run_fleet(namespaces, measure_performance, (url,), num_iterations, mode=mode)
+    print_fleet_summary(per_ue, elapsed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import os
+import threading
+import time
+
+from tgran_stats import LatencyHistogram
+
+class GeneratorMonitor:
+    """
+    Measures the generator itself while an open-loop run is going on.
+
+    Every request carries the deadline the ArrivalScheduler gave it. The monitor
+    records how late it actually started (scheduler lag + time queued in the executor),
+    how long it took once started, and the latency from its *scheduled* start to its
+    end. The last one is the coordinated-omission corrected latency: when the generator
+    falls behind, the delay a real client would have seen is counted instead of hidden.
+    A sampler thread follows executor queue depth, in-flight requests and process CPU;
+    the CPU time of the scheduler loop itself is taken between start() and stop(),
+    which must be called from the loop's own thread.
+
+    :param max_workers: Size of the executor, only shown in the report (0 for the async engine)
+    :param sample_interval: Seconds between queue/in-flight/CPU samples
+    :param lag_warn_ms: p99 start lag above which the generator is flagged as behind
+    :param cpu_warn: Busy fraction of one core above which the loop/process is flagged
+    """
+
+    def __init__(self, max_workers=0, sample_interval=0.5, lag_warn_ms=50.0, cpu_warn=0.85):
+        self.max_workers = max_workers
+        self.sample_interval = sample_interval
+        self.lag_warn_ms = lag_warn_ms
+        self.cpu_warn = cpu_warn
+
+        self.start_lag = LatencyHistogram()
+        self.service = LatencyHistogram()
+        self.corrected = LatencyHistogram()
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.in_flight = 0
+        self.max_queued = 0
+        self.max_in_flight = 0
+        self.samples = 0
+        self.queued_sum = 0
+        self.max_process_cpu = 0.0
+
+        self._stop = threading.Event()
+        self._sampler = None
+        self.wall = 0.0
+        self.loop_cpu = 0.0
+        self.process_cpu = 0.0
+
+    def start(self):
+        self._wall_start = time.perf_counter()
+        self._loop_start = time.thread_time()
+        self._process_start = time.process_time()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        self.wall = time.perf_counter() - self._wall_start
+        self.loop_cpu = time.thread_time() - self._loop_start
+        self.process_cpu = time.process_time() - self._process_start
+        self._stop.set()
+        self._sampler.join()
+
+    def _sample(self):
+        last_wall, last_cpu = time.perf_counter(), time.process_time()
+        while not self._stop.wait(self.sample_interval):
+            wall, cpu = time.perf_counter(), time.process_time()
+            self.max_process_cpu = max(self.max_process_cpu, (cpu - last_cpu) / (wall - last_wall))
+            last_wall, last_cpu = wall, cpu
+            with self._lock:
+                self.samples += 1
+                self.queued_sum += self.queued
+
+    def queue(self):
+        """Called when a request is handed to the executor / event loop."""
+        with self._lock:
+            self.queued += 1
+            if self.queued > self.max_queued:
+                self.max_queued = self.queued
+
+    def begin(self, deadline):
+        """Called when the request really starts; returns its start time for end()."""
+        start = time.perf_counter()
+        with self._lock:
+            self.queued -= 1
+            self.in_flight += 1
+            if self.in_flight > self.max_in_flight:
+                self.max_in_flight = self.in_flight
+            self.start_lag.record(max(start - deadline, 0.0) * 1000)
+        return start
+
+    def end(self, deadline, start):
+        now = time.perf_counter()
+        with self._lock:
+            self.in_flight -= 1
+            self.service.record((now - start) * 1000)
+            self.corrected.record((now - deadline) * 1000)
+
+    def _run(self, deadline, fn, args):
+        start = self.begin(deadline)
+        try:
+            return fn(*args)
+        finally:
+            self.end(deadline, start)
+
+    def submit(self, executor, deadline, fn, *args):
+        """executor.submit(fn, *args), timed against the scheduled ``deadline``."""
+        self.queue()
+        return executor.submit(self._run, deadline, fn, args)
+
+    def warnings(self):
+        """Reasons why the generator, not the network, limited the run (empty when healthy)."""
+        reasons = []
+        lag = self.start_lag.percentile(99)
+        if lag > self.lag_warn_ms:
+            reasons.append(f"p99 request mulai {lag:.1f} ms setelah jadwal (batas {self.lag_warn_ms:g} ms)")
+        if self.samples and self.queued_sum / self.samples >= 1:
+            pool = f"{self.max_workers} worker, " if self.max_workers else ""
+            reasons.append(f"request menunggu giliran ({pool}rata-rata {self.queued_sum / self.samples:.0f} antre, "
+                           f"max {self.max_queued}, in-flight max {self.max_in_flight})")
+        if self.wall and self.loop_cpu / self.wall > self.cpu_warn:
+            reasons.append(f"loop scheduler memakai {self.loop_cpu / self.wall * 100:.0f}% CPU satu core")
+        if self.max_process_cpu > self.cpu_warn:
+            reasons.append(f"proses memakai hingga {self.max_process_cpu * 100:.0f}% CPU (GIL/CPU jenuh, "
+                           f"{os.cpu_count()} core tersedia)")
+        return reasons
+
+    def report(self):
+        return {
+            'start_lag_ms': self.start_lag.summary(),
+            'service_ms': self.service.summary(),
+            'corrected_ms': self.corrected.summary(),
+            'max_queued': self.max_queued,
+            'avg_queued': self.queued_sum / self.samples if self.samples else 0.0,
+            'max_in_flight': self.max_in_flight,
+            'loop_cpu': self.loop_cpu / self.wall if self.wall else 0.0,
+            'process_cpu': self.process_cpu / self.wall if self.wall else 0.0,
+            'max_process_cpu': self.max_process_cpu,
+            'warnings': self.warnings(),
+        }
+
+    def print_report(self):
+        r = self.report()
+        lag, service, corrected = r['start_lag_ms'], r['service_ms'], r['corrected_ms']
+        print(f"\n🩺 Generator: antrean max {r['max_queued']} (rata-rata {r['avg_queued']:.1f}) "
+              f"| in-flight max {r['max_in_flight']} | CPU loop {r['loop_cpu'] * 100:.0f}% "
+              f"| CPU proses {r['process_cpu'] * 100:.0f}% (puncak {r['max_process_cpu'] * 100:.0f}%)")
+        print(f"   Lag start  p50: {lag['p50']:.2f} ms | p99: {lag['p99']:.2f} ms | max: {lag['max']:.2f} ms")
+        print(f"   Latency    p50: {service['p50']:.2f} ms | p99: {service['p99']:.2f} ms | max: {service['max']:.2f} ms")
+        print(f"   Terkoreksi p50: {corrected['p50']:.2f} ms | p99: {corrected['p99']:.2f} ms "
+              f"| max: {corrected['max']:.2f} ms (dari waktu terjadwal, coordinated omission)")
+        if r['warnings']:
+            print("\n" + "!" * 70)
+            print("⚠️  GENERATOR ADALAH BOTTLENECK, BUKAN JARINGAN — latency di log terlihat lebih baik dari kenyataan")
+            for reason in r['warnings']:
+                print(f"   - {reason}")
+            print("   Pakai latency terkoreksi di atas, turunkan rate, tambah worker/shard, atau pakai engine async.")
+            print("!" * 70)
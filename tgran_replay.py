@@ -0,0 +1,228 @@
+import argparse
+import gzip
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+
+from tgran_scenario import FLOW_SCRIPTS, load_script, install_log_writers, install_metrics
+from tgran_metrics import LiveMetrics
+from tgran_stats import LatencyHistogram, TrafficStats
+from tgran_tls import print_tls_report
+
+# Nama field yang diterima di setiap baris trace
+TIME_FIELDS = ('ts', 'timestamp', 'time')
+SOURCE_FIELDS = ('source_ip', 'src', 'client_ip')
+
+def _field(record, names, default=None):
+    for name in names:
+        if name in record:
+            return record[name]
+    return default
+
+def _seconds(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+def read_trace(path):
+    """
+    Lazily yields ``(line_no, offset, url, source_ip, kind)`` from a JSONL request trace.
+
+    One JSON object per line, e.g.
+    ``{"ts": 1718000000.125, "url": "http://10.0.0.1/a.html", "src": "10.45.0.7", "type": "web"}``.
+    The time field (ts/timestamp/time) is epoch seconds or an ISO-8601 string; offsets
+    are relative to the first record. Source IP and type are optional. Lines are read
+    one at a time (``.gz`` files too), so a trace of any size uses constant memory.
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    first = None
+    with opener(path, 'rt') as file:
+        for line_no, line in enumerate(file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            ts = _seconds(_field(record, TIME_FIELDS))
+            if first is None:
+                first = ts
+            yield line_no, ts - first, record['url'], _field(record, SOURCE_FIELDS, ''), record.get('type')
+
+class SourceIPMap:
+    """
+    Maps source IPs seen in the trace onto local source IP indexes.
+
+    Explicit ``mapping`` entries win; every other trace IP is assigned the next local
+    IP round-robin the first time it appears and keeps it, so one recorded client
+    always replays from the same local address.
+
+    :param local_ips: Local source IPs to replay from
+    :param mapping: Optional ``{trace_ip: local_ip}``
+    """
+
+    def __init__(self, local_ips, mapping=None):
+        self.local_ips = list(local_ips)
+        if not self.local_ips:
+            raise ValueError("Minimal satu source IP lokal diperlukan")
+        self._assigned = {}
+        for ip, local in (mapping or {}).items():
+            if local not in self.local_ips:
+                raise ValueError(f"Pemetaan {ip} -> {local}: {local} tidak ada di source IP lokal "
+                                 f"({', '.join(self.local_ips)})")
+            self._assigned[ip] = self.local_ips.index(local)
+        self._next = 0
+
+    def __call__(self, trace_ip):
+        index = self._assigned.get(trace_ip)
+        if index is None:
+            index = self._assigned[trace_ip] = self._next % len(self.local_ips)
+            self._next += 1
+        return index
+
+def replay(path, local_ips, speed=1.0, kind='http', late_ms=10.0, mapping=None, max_workers=200, name='replay',
+           log_format='tsv', pool_size=10, verify=True, tls_resume=True, streaming=False, metrics=None, verbose=True,
+           max_pending=None):
+    """
+    Re-issues a recorded trace at its original relative timing divided by ``speed``.
+
+    A request is late when it starts executing more than ``late_ms`` after its scaled
+    timestamp, either because the reader fell behind or because the thread pool was
+    saturated. Late requests are counted, their lag goes into a histogram and each
+    one is listed in ``<name>_late.log`` (trace line, URL, scheduled offset, lag).
+    At most ``max_pending`` requests are queued or running; when the target falls
+    behind the reader waits for a free slot, and every request that had to wait is
+    counted as late.
+
+    :param path: JSONL trace (see read_trace)
+    :param local_ips: Local source IPs (see SourceIPMap)
+    :param speed: Time compression, e.g. 10 replays ten times faster
+    :param kind: 'http' or 'web' for records without a "type" field
+    :param late_ms: Lag above which a request is flagged late
+    :param mapping: Optional ``{trace_ip: local_ip}``
+    :param max_workers: Size of the request thread pool
+    :param name: Prefix for the log files
+    :param log_format: 'tsv' or 'columnar' for the request logs
+    :param metrics: Optional LiveMetrics (endpoint and/or summary line)
+    :param verbose: Print every request like the scripts do
+    :param max_pending: Bound on queued + running requests (default 2x ``max_workers``)
+    """
+    if speed <= 0:
+        raise ValueError("speed harus > 0")
+    source_map = SourceIPMap(local_ips, mapping)
+    kinds = {}
+    writers = []
+
+    def prepare(k):
+        # Hanya jenis yang benar-benar ada di trace yang dapat session dan file log
+        if k not in FLOW_SCRIPTS:
+            raise ValueError(f"Unknown request type {k!r}, pilih salah satu dari {tuple(FLOW_SCRIPTS)}")
+        module = load_script(FLOW_SCRIPTS[k])
+        sessions, contexts = module.make_sessions(local_ips, pool_size, verify, tls_resume)
+        request = partial(module.make_request, streaming=streaming) if k == 'web' else module.make_request
+        kinds[k] = (request, sessions, contexts, TrafficStats(module.LOG_COLUMNS))
+        writers.extend(install_log_writers([k], name, log_format))
+        install_metrics([k], metrics, verbose)
+        return kinds[k]
+
+    prepare(kind)
+
+    lock = threading.Lock()
+    lag_hist = LatencyHistogram()
+    late = [0]
+    slots = threading.Semaphore(max_pending or 2 * max_workers)
+    late_file = open(f"{name}_late.log", mode='w')
+    late_file.write("Line\tURL\tScheduled (s)\tLag (ms)\n")
+
+    def run(line_no, offset, url, request, session, results, deadline, blocked):
+        try:
+            lag = (time.perf_counter() - deadline) * 1000
+            with lock:
+                lag_hist.record(max(lag, 0.0))
+                if lag > late_ms or blocked:
+                    late[0] += 1
+                    late_file.write(f"{line_no}\t{url}\t{offset:.6f}\t{lag:.2f}\n")
+            request(url, results, session)
+        finally:
+            slots.release()
+
+    print(f"▶️ Replay {path} dengan kecepatan {speed:g}x dari {len(local_ips)} source IP")
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    if metrics is not None:
+        metrics.start()
+    sent = 0
+    start = time.perf_counter()
+    try:
+        for line_no, offset, url, trace_ip, record_kind in read_trace(path):
+            record_kind = record_kind or kind
+            request, sessions, _, results = kinds.get(record_kind) or prepare(record_kind)
+            scaled = offset / speed
+            deadline = start + scaled
+            now = time.perf_counter()
+            if deadline > now:
+                time.sleep(deadline - now)
+            # Antrean executor dibatasi; kalau penuh, tunggu slot dan tandai request ini terlambat
+            blocked = not slots.acquire(blocking=False)
+            if blocked:
+                slots.acquire()
+            executor.submit(run, line_no, scaled, url, request, sessions[source_map(trace_ip)], results, deadline,
+                            blocked)
+            sent += 1
+    except KeyboardInterrupt:
+        print("\n⏹️ Dihentikan, menunggu request yang sedang berjalan...")
+    finally:
+        executor.shutdown(wait=True)
+        if metrics is not None:
+            metrics.stop()
+        for writer in writers:
+            writer.close()
+        late_file.close()
+
+    elapsed = time.perf_counter() - start
+    s = lag_hist.summary()
+    print(f"\n⏱️ {sent} request dalam {elapsed:.2f} s | Lag start p50: {s['p50']:.2f} ms | p99: {s['p99']:.2f} ms "
+          f"| max: {s['max']:.2f} ms")
+    if late[0]:
+        print(f"⚠️ {late[0]} request ({late[0] / max(sent, 1) * 100:.1f}%) terlambat > {late_ms:g} ms, "
+              f"lihat {name}_late.log")
+    for k, (_, _, contexts, results) in kinds.items():
+        if len(results):
+            print(f"\n########## {k} ##########")
+            results.print_report()
+            print_tls_report(contexts)
+    return {'sent': sent, 'late': late[0], 'lag': s, 'results': {k: v[3] for k, v in kinds.items()}}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay trace request JSONL dengan time compression")
+    parser.add_argument('trace', help="File trace .jsonl (atau .jsonl.gz)")
+    parser.add_argument('--source-ips', required=True, help="Source IP lokal, pisahkan dengan koma")
+    parser.add_argument('--speed', type=float, default=1.0, help="Faktor kecepatan, mis. 10 = 10x lebih cepat")
+    parser.add_argument('--type', default='http', choices=sorted(FLOW_SCRIPTS), help="Jenis request jika tidak ada di trace")
+    parser.add_argument('--late-ms', type=float, default=10.0, help="Batas lag sebelum request ditandai terlambat")
+    parser.add_argument('--map', action='append', default=[], metavar='TRACE_IP=LOCAL_IP',
+                        help="Pemetaan source IP tetap (boleh diulang)")
+    parser.add_argument('--workers', type=int, default=200, help="Ukuran thread pool")
+    parser.add_argument('--log-format', default='tsv', choices=('tsv', 'columnar'))
+    parser.add_argument('--no-verify', action='store_true', help="Jangan verifikasi sertifikat HTTPS")
+    parser.add_argument('--quiet', action='store_true', help="Ringkasan per detik, bukan print per request")
+    parser.add_argument('--metrics-port', type=int, help="Port endpoint metrics Prometheus")
+    parser.add_argument('--metrics-bind', default='127.0.0.1', help="Alamat endpoint metrics (0.0.0.0 = semua interface)")
+    args = parser.parse_args(argv)
+
+    local_ips = [ip.strip() for ip in args.source_ips.split(',')]
+    mapping = {}
+    for item in args.map:
+        trace_ip, sep, local_ip = item.partition('=')
+        if not sep:
+            parser.error(f"--map {item!r}: format harus TRACE_IP=LOCAL_IP")
+        mapping[trace_ip.strip()] = local_ip.strip()
+    metrics = None
+    if args.quiet or args.metrics_port:
+        metrics = LiveMetrics(port=args.metrics_port, summary_interval=1.0 if args.quiet else None,
+                              bind_ip=args.metrics_bind)
+    replay(args.trace, local_ips, args.speed, args.type, args.late_ms, mapping, args.workers,
+           log_format=args.log_format, verify=not args.no_verify, metrics=metrics, verbose=not args.quiet)
+
+if __name__ == "__main__":
+    main()
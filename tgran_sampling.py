@@ -0,0 +1,84 @@
+import numpy as np
+
+def spawn_seeds(seed, n):
+    """Spawns ``n`` independent child seeds from an int, None or an existing SeedSequence."""
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return seed.spawn(n)
+
+class AliasSampler:
+    """
+    Walker/Vose alias table for O(1) draws from a fixed discrete distribution.
+
+    :param probabilities: Probability vector, e.g. the output of zipf_mandelbrot()
+    """
+
+    def __init__(self, probabilities):
+        p = np.asarray(probabilities, dtype=np.float64)
+        n = len(p)
+        scaled = (p / p.sum() * n).tolist()
+        accept = [1.0] * n
+        alias = list(range(n))
+
+        small = [i for i, v in enumerate(scaled) if v < 1.0]
+        large = [i for i, v in enumerate(scaled) if v >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            accept[s] = scaled[s]
+            alias[s] = l
+            scaled[l] = scaled[l] + scaled[s] - 1.0
+            if scaled[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+        # Sisa entri (karena pembulatan float) diterima dengan probabilitas 1
+
+        self.n = n
+        self.accept = np.array(accept, dtype=np.float64)
+        self.alias = np.array(alias, dtype=np.int64)
+
+    def sample(self, rng, size):
+        """Draws ``size`` indices in one vectorized pass."""
+        column = rng.integers(0, self.n, size)
+        coin = rng.random(size)
+        return np.where(coin < self.accept[column], column, self.alias[column])
+
+class RequestSchedule:
+    """
+    Precomputed (url index, source index) pairs for a traffic run.
+
+    Draws are made in vectorized chunks of ``chunk_size`` so the submit loop only
+    walks plain Python ints; memory stays at one chunk for any ``num_requests``.
+    The same ``seed`` always yields the same request sequence.
+
+    :param probabilities: Zipf-Mandelbrot probabilities over the URL ranks
+    :param num_sources: Number of source IPs / sessions to spread requests over
+    :param num_requests: Total number of requests in the schedule (None = endless)
+    :param seed: Seed (int or np.random.SeedSequence) for the generator
+    :param chunk_size: Requests drawn per vectorized batch
+    """
+
+    def __init__(self, probabilities, num_sources, num_requests, seed=None, chunk_size=65536):
+        self.sampler = AliasSampler(probabilities)
+        self.num_sources = num_sources
+        self.num_requests = num_requests
+        self.seed = seed
+        self.chunk_size = chunk_size
+
+    def chunks(self):
+        """Yields ``(url_idx, source_idx)`` array pairs of up to ``chunk_size`` requests."""
+        rng = np.random.default_rng(self.seed)
+        remaining = self.num_requests
+        while remaining is None or remaining > 0:
+            n = self.chunk_size if remaining is None else min(self.chunk_size, remaining)
+            yield self.sampler.sample(rng, n), rng.integers(0, self.num_sources, n)
+            if remaining is not None:
+                remaining -= n
+
+    def __iter__(self):
+        for url_idx, source_idx in self.chunks():
+            yield from zip(url_idx.tolist(), source_idx.tolist())
+
+    def __len__(self):
+        return self.num_requests
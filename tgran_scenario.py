@@ -0,0 +1,297 @@
+import argparse
+import heapq
+import importlib.util
+import json
+import os
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from tgran_scheduler import RampProfile
+from tgran_sampling import RequestSchedule, spawn_seeds
+from tgran_stats import TrafficStats
+from tgran_logwriter import LogWriter
+from tgran_metrics import LiveMetrics
+from tgran_catalog import open_catalog
+from tgran_tls import print_tls_report
+
+FLOW_TYPES = ('web', 'http', 'udp')
+# Script yang menjalankan tiap jenis flow request
+FLOW_SCRIPTS = {'web': 'tgran-tcp.py', 'http': 'tgran-http.py'}
+
+_scripts = {}
+
+def load_script(filename):
+    """
+    Imports one of the hyphenated tgran-*.py scripts as a module (once per process).
+
+    The module is registered in sys.modules under ``tgran_<name>_script`` so its
+    functions can also be pickled by name, e.g. for run_sharded.
+    """
+    if filename not in _scripts:
+        name = 'tgran_' + os.path.splitext(os.path.basename(filename))[0].split('-', 1)[-1] + '_script'
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+        _scripts[filename] = module
+    return _scripts[filename]
+
+def load_scenario(path):
+    """Reads a scenario from a .json or .toml file."""
+    if path.endswith('.toml'):
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            import tomli as tomllib
+        with open(path, 'rb') as file:
+            return tomllib.load(file)
+    with open(path) as file:
+        return json.load(file)
+
+def read_urls(source, num_urls=None):
+    """URLs from a list or a catalog file (CSV with a 'URL' column like url_http.csv, or .tgc)."""
+    if isinstance(source, list):
+        return source[:num_urls] if num_urls else source
+    return open_catalog(source, num_urls)
+
+def build_profile(flow):
+    """
+    RampProfile of a flow: either explicit ``stages`` (``{duration, rate}`` for a flat
+    stage or ``{duration, from, to}`` for a ramp) or ``rate`` + ``ramp_up``/``steady``/``ramp_down``.
+    """
+    if 'stages' in flow:
+        stages = []
+        for stage in flow['stages']:
+            if 'rate' in stage:
+                stages.append((stage['duration'], stage['rate'], stage['rate']))
+            else:
+                stages.append((stage['duration'], stage['from'], stage['to']))
+        return RampProfile(stages)
+    return RampProfile.simple(flow['rate'], flow.get('steady', 0), flow.get('ramp_up', 0), flow.get('ramp_down', 0))
+
+def install_log_writers(kinds, name, log_format='tsv'):
+    """
+    Gives the script of every flow kind its own LogWriter (``<name>_<kind>.log``/``.tglc``).
+
+    Files are truncated first and TSV files start with the LOG_COLUMNS header like
+    main() writes it. Returns the writers so the caller can close them after the run.
+    """
+    writers = []
+    for kind in sorted(kinds):
+        module = load_script(FLOW_SCRIPTS[kind])
+        filename = f"{name}_{kind}.log" if log_format == 'tsv' else f"{name}_{kind}.tglc"
+        if log_format == 'tsv':
+            with open(filename, mode='w') as file:
+                file.write('\t'.join(module.LOG_COLUMNS) + '\n')
+        else:
+            open(filename, 'wb').close()
+        module.LOG_WRITER = LogWriter(filename, module.LOG_COLUMNS, log_format)
+        writers.append(module.LOG_WRITER)
+    return writers
+
+def install_metrics(kinds, metrics, verbose=True):
+    """
+    Gives the script of every flow kind a FlowMetrics view of ``metrics`` (label = kind)
+    and sets its VERBOSE flag (False = no print per request).
+    """
+    for kind in sorted(kinds):
+        module = load_script(FLOW_SCRIPTS[kind])
+        module.METRICS = metrics.flow(kind, module.LOG_COLUMNS) if metrics is not None else None
+        module.VERBOSE = verbose
+
+class RequestFlow:
+    """Web page loads (tgran-tcp.py) or plain HTTP GETs (tgran-http.py) of one scenario flow."""
+
+    def __init__(self, index, flow, seed):
+        self.index = index
+        self.name = flow.get('name', f"flow{index}")
+        self.kind = flow['type']
+        self.module = load_script(FLOW_SCRIPTS[self.kind])
+        self.urls = read_urls(flow['urls'], flow.get('num_urls'))
+        self.source_ips = flow.get('source_ips', [''])
+        self.profile = build_profile(flow)
+        self.sessions, self.contexts = self.module.make_sessions(
+            self.source_ips, flow.get('pool_size', 10), flow.get('verify', True), flow.get('tls_resume', True))
+        self.request = self.module.make_request
+        if self.kind == 'web':
+            self.request = partial(self.module.make_request, streaming=flow.get('streaming', False))
+        self.results = TrafficStats(self.module.LOG_COLUMNS)
+
+        schedule_seed, arrival_seed = spawn_seeds(seed, 2)
+        probabilities = self.module.zipf_mandelbrot(len(self.urls), *map(float, flow.get('zipf', (1.0, 1.0))))
+        self.pairs = iter(RequestSchedule(probabilities, len(self.source_ips), None, schedule_seed))
+        self.arrivals = self.profile.offsets(flow.get('arrival', 'constant'), flow.get('burst_size', 10), arrival_seed)
+        self.sent = 0
+
+    def fire(self, executor, count):
+        for _ in range(count):
+            url_idx, source_idx = next(self.pairs)
+            executor.submit(self.request, self.urls[url_idx], self.results, self.sessions[source_idx])
+        self.sent += count
+
+    def close(self):
+        for session in self.sessions:
+            session.close()
+
+    def report(self):
+        print(f"\n########## Flow {self.name} ({self.kind}): {self.sent} request, "
+              f"rencana {self.profile.total:.0f} dalam {self.profile.duration:.0f} s ##########")
+        self.results.print_report()
+        print_tls_report(self.contexts)
+
+class UdpFlow:
+    """
+    Sequenced UDP stream (testing_udp.BatchSender + PROBE_HEADER) of one scenario flow.
+
+    The flow's rate is in packets per second; every scheduler event sends one batch.
+    The packets can be checked with testing_udp.run_udp_receiver on the target.
+    """
+
+    def __init__(self, index, flow, seed):
+        from testing_udp import BatchSender, PROBE_HEADER
+        self.index = index
+        self.name = flow.get('name', f"flow{index}")
+        self.kind = 'udp'
+        self.header = PROBE_HEADER
+        host, port = flow['target'].rsplit(':', 1)
+        self.packet_size = max(flow.get('packet_size', 512), PROBE_HEADER.size)
+        self.batch_size = flow.get('batch_size', 32)
+        self.profile = build_profile(flow)
+        self.senders = []
+        for ip in flow.get('source_ips', ['']):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            if ip:
+                sock.bind((ip, 0))
+            sock.connect((host, int(port)))
+            self.senders.append(BatchSender(sock, self.packet_size, self.batch_size))
+        # Satu event scheduler = satu batch paket
+        self.arrivals = self.profile.offsets('burst', self.batch_size)
+        self.seq = 0
+        self.sent = 0
+        self.errors = 0
+
+    def fire(self, executor, count):
+        sender = self.senders[self.seq // self.batch_size % len(self.senders)]
+        now_ns = time.time_ns()
+        for i in range(count):
+            self.header.pack_into(sender.buffer, i * self.packet_size, self.index, self.seq + i, now_ns)
+        self.seq += count
+        sent, errors = sender.send(count)
+        self.sent += sent
+        self.errors += errors
+
+    def close(self):
+        for sender in self.senders:
+            sender.sock.close()
+
+    def report(self):
+        print(f"\n########## Flow {self.name} (udp): {self.sent} paket ({self.sent * self.packet_size / 1e6:.2f} MB), "
+              f"{self.errors} error, rencana {self.profile.total:.0f} dalam {self.profile.duration:.0f} s ##########")
+
+def run_scenario(scenario, name='scenario', metrics=None, verbose=True):
+    """
+    Runs every flow of a scenario from one scheduler thread.
+
+    All arrivals of all flows go through a single heap ordered by deadline, so flows
+    never compete with each other for the CPU as separate processes would; requests
+    are handed to one shared thread pool, UDP batches are sent inline.
+
+    :param scenario: Parsed scenario (see load_scenario)
+    :param name: Prefix for the log files (``<name>_web.log``, ``<name>_http.log``)
+    :param metrics: Optional LiveMetrics for the web/http flows (endpoint and/or summary line)
+    :param verbose: Print every request like the scripts do
+    """
+    flows_config = scenario['flows']
+    seeds = spawn_seeds(scenario.get('seed'), len(flows_config))
+    flows = []
+    for i, (flow, seed) in enumerate(zip(flows_config, seeds)):
+        if flow['type'] not in FLOW_TYPES:
+            raise ValueError(f"Jenis flow {flow['type']!r} tidak dikenal, pilih salah satu dari {FLOW_TYPES}")
+        flows.append(UdpFlow(i, flow, seed) if flow['type'] == 'udp' else RequestFlow(i, flow, seed))
+
+    kinds = {flow.kind for flow in flows} - {'udp'}
+    writers = install_log_writers(kinds, name, scenario.get('log_format', 'tsv'))
+    install_metrics(kinds, metrics, verbose)
+
+    heap = []
+    for flow in flows:
+        first = next(flow.arrivals, None)
+        if first is not None:
+            heapq.heappush(heap, (first[0], flow.index, first[1]))
+
+    print(f"▶️ Scenario {name}: {len(flows)} flow, "
+          f"{max((flow.profile.duration for flow in flows), default=0):.0f} detik")
+    executor = ThreadPoolExecutor(max_workers=scenario.get('max_workers', 200))
+    if metrics is not None:
+        metrics.start()
+    max_lag = total_lag = 0.0
+    events = 0
+    start = time.perf_counter()
+    try:
+        while heap:
+            offset, index, count = heapq.heappop(heap)
+            deadline = start + offset
+            now = time.perf_counter()
+            if deadline > now:
+                time.sleep(deadline - now)
+                now = time.perf_counter()
+            lag = now - deadline
+            max_lag = max(max_lag, lag)
+            total_lag += lag
+            events += 1
+
+            flow = flows[index]
+            flow.fire(executor, count)
+            following = next(flow.arrivals, None)
+            if following is not None:
+                heapq.heappush(heap, (following[0], index, following[1]))
+    except KeyboardInterrupt:
+        print("\n⏹️ Dihentikan, menunggu request yang sedang berjalan...")
+    finally:
+        executor.shutdown(wait=True)
+        if metrics is not None:
+            metrics.stop()
+        for writer in writers:
+            writer.close()
+        for flow in flows:
+            flow.close()
+
+    print(f"\n⏱️ Scheduler: {events} event dalam {time.perf_counter() - start:.2f} s "
+          f"| Max lag: {max_lag * 1000:.2f} ms | Avg lag: {total_lag / max(events, 1) * 1000:.3f} ms")
+    for flow in flows:
+        flow.report()
+    return flows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Jalankan beberapa flow traffic (web/http/udp) dari satu file scenario")
+    parser.add_argument('scenario', help="File scenario .json atau .toml")
+    parser.add_argument('--seed', type=int, help="Override seed di file scenario")
+    parser.add_argument('--dry-run', action='store_true', help="Hanya tampilkan rencana tiap flow")
+    parser.add_argument('--quiet', action='store_true', help="Ringkasan per detik, bukan print per request")
+    parser.add_argument('--metrics-port', type=int, help="Port endpoint metrics Prometheus")
+    parser.add_argument('--metrics-bind', default='127.0.0.1', help="Alamat endpoint metrics (0.0.0.0 = semua interface)")
+    args = parser.parse_args(argv)
+
+    scenario = load_scenario(args.scenario)
+    if args.seed is not None:
+        scenario['seed'] = args.seed
+    name = os.path.splitext(os.path.basename(args.scenario))[0]
+
+    if args.dry_run:
+        for i, flow in enumerate(scenario['flows']):
+            profile = build_profile(flow)
+            unit = "paket" if flow['type'] == 'udp' else "request"
+            print(f"{flow.get('name', f'flow{i}')}\t{flow['type']}\t{profile.total:.0f} {unit}\t{profile.duration:.0f} s")
+        return
+    metrics = None
+    if args.quiet or args.metrics_port:
+        metrics = LiveMetrics(port=args.metrics_port, summary_interval=1.0 if args.quiet else None,
+                              bind_ip=args.metrics_bind)
+    run_scenario(scenario, name, metrics, not args.quiet)
+
+if __name__ == "__main__":
+    main()
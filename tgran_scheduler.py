@@ -0,0 +1,188 @@
+import asyncio
+import math
+import time
+import numpy as np
+
+ARRIVAL_MODES = ('constant', 'poisson', 'burst')
+
+class ArrivalScheduler:
+    """
+    Open-loop arrival process that releases requests on absolute deadlines.
+
+    Every deadline is computed from the start of the run, so time spent submitting
+    a request or oversleeping never accumulates into the offered rate.
+
+    :param num_requests: Number of arrivals to release
+    :param requests_per_second: Target (mean) arrival rate
+    :param mode: 'constant', 'poisson' (exponential inter-arrival) or 'burst'
+    :param burst_size: Requests released back-to-back per burst in 'burst' mode
+    :param seed: Optional seed for the Poisson inter-arrival draws
+    """
+
+    def __init__(self, num_requests, requests_per_second, mode='constant', burst_size=10, seed=None):
+        if mode not in ARRIVAL_MODES:
+            raise ValueError(f"Unknown arrival mode {mode!r}, pilih salah satu dari {ARRIVAL_MODES}")
+        if requests_per_second <= 0:
+            raise ValueError("requests_per_second harus > 0")
+        self.num_requests = num_requests
+        self.requests_per_second = requests_per_second
+        self.mode = mode
+        self.burst_size = max(1, int(burst_size))
+        self.rng = np.random.default_rng(seed)
+
+        self.start = None
+        self.last_send = None
+        self.sent = 0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+
+    def offsets(self, block=4096):
+        """Yields the deadline of each arrival in seconds relative to the start of the run."""
+        rate = self.requests_per_second
+        if self.mode == 'constant':
+            for i in range(self.num_requests):
+                yield i / rate
+        elif self.mode == 'burst':
+            period = self.burst_size / rate
+            for i in range(self.num_requests):
+                yield (i // self.burst_size) * period
+        else:
+            t = 0.0
+            remaining = self.num_requests
+            while remaining > 0:
+                n = min(block, remaining)
+                gaps = self.rng.exponential(1 / rate, n)
+                if remaining == self.num_requests:
+                    gaps[0] = 0.0  # arrival pertama langsung di awal run
+                offsets = t + np.cumsum(gaps)
+                yield from offsets.tolist()
+                t = offsets[-1]
+                remaining -= n
+
+    def _mark(self, deadline, now):
+        lag = now - deadline
+        if lag > self.max_lag:
+            self.max_lag = lag
+        self.total_lag += lag
+        self.sent += 1
+        self.last_send = now
+
+    def __iter__(self):
+        self.start = time.perf_counter()
+        for offset in self.offsets():
+            deadline = self.start + offset
+            now = time.perf_counter()
+            if deadline > now:
+                time.sleep(deadline - now)
+                now = time.perf_counter()
+            self._mark(deadline, now)
+            yield deadline
+
+    async def _aiter(self):
+        self.start = time.perf_counter()
+        for offset in self.offsets():
+            deadline = self.start + offset
+            now = time.perf_counter()
+            if deadline > now:
+                await asyncio.sleep(deadline - now)
+                now = time.perf_counter()
+            self._mark(deadline, now)
+            yield deadline
+
+    def __aiter__(self):
+        return self._aiter()
+
+    def report(self):
+        """Returns target vs achieved rate and schedule lag of the finished run."""
+        if not self.sent:
+            return {'target_rps': self.requests_per_second, 'achieved_rps': 0.0, 'sent': 0,
+                    'max_lag_ms': 0.0, 'avg_lag_ms': 0.0}
+        # Satu slot nominal ditambahkan supaya mode constant/burst tepat sama dengan target
+        slot = self.burst_size / self.requests_per_second if self.mode == 'burst' else 1 / self.requests_per_second
+        elapsed = self.last_send - self.start + slot
+        return {
+            'target_rps': self.requests_per_second,
+            'achieved_rps': self.sent / elapsed,
+            'sent': self.sent,
+            'max_lag_ms': self.max_lag * 1000,
+            'avg_lag_ms': self.total_lag / self.sent * 1000,
+        }
+
+    def print_report(self):
+        r = self.report()
+        print(f"\n🎯 Target RPS: {r['target_rps']:.2f} | Achieved RPS: {r['achieved_rps']:.2f} "
+              f"| Max lag: {r['max_lag_ms']:.2f} ms | Avg lag: {r['avg_lag_ms']:.3f} ms ({self.mode})")
+
+class RampProfile:
+    """
+    Piecewise-linear rate profile (ramp-up / steady / ramp-down stages).
+
+    Each stage is ``(duration, start_rate, end_rate)``; the rate changes linearly within
+    a stage. ``time_at(n)`` inverts the cumulative number of arrivals, so the n-th
+    arrival of a ramping flow lands exactly where the integral of the rate reaches n.
+
+    :param stages: List of ``(duration, start_rate, end_rate)`` tuples
+    """
+
+    def __init__(self, stages):
+        self.stages = [(float(d), float(r0), float(r1)) for d, r0, r1 in stages]
+        if any(d <= 0 or r0 < 0 or r1 < 0 for d, r0, r1 in self.stages):
+            raise ValueError("Durasi stage harus > 0 dan rate tidak boleh negatif")
+        self.duration = sum(d for d, _, _ in self.stages)
+        self.total = sum(d * (r0 + r1) / 2 for d, r0, r1 in self.stages)
+
+    @classmethod
+    def simple(cls, rate, steady, ramp_up=0, ramp_down=0):
+        """Ramp from 0 to ``rate``, hold it for ``steady`` seconds, ramp back to 0."""
+        stages = []
+        if ramp_up:
+            stages.append((ramp_up, 0, rate))
+        if steady:
+            stages.append((steady, rate, rate))
+        if ramp_down:
+            stages.append((ramp_down, rate, 0))
+        return cls(stages)
+
+    def rate_at(self, t):
+        for d, r0, r1 in self.stages:
+            if t < d:
+                return r0 + (r1 - r0) * t / d
+            t -= d
+        return 0.0
+
+    def time_at(self, n):
+        """Time (s) at which the cumulative arrivals reach ``n``, or None after the last stage."""
+        start = 0.0
+        last_end = None
+        remaining = n
+        for d, r0, r1 in self.stages:
+            area = d * (r0 + r1) / 2
+            if area > 0:
+                last_end = start + d
+            if area > 0 and remaining <= area:
+                if r0 == r1:
+                    return start + remaining / r0
+                # r0*x + k/2*x^2 = n, k = kemiringan rate
+                k = (r1 - r0) / d
+                return start + (math.sqrt(max(r0 * r0 + 2 * k * remaining, 0.0)) - r0) / k
+            remaining -= area
+            start += d
+        # Sisa pembulatan float: n <= total tapi melewati semua stage, pakai akhir stage terakhir
+        return last_end if n <= self.total else None
+
+    def offsets(self, mode='constant', burst_size=1, seed=None):
+        """
+        Yields ``(offset, count)`` arrivals: ``count`` requests released at ``offset`` seconds.
+
+        'constant' spaces arrivals evenly in arrival-count space, 'poisson' uses unit
+        exponential gaps (a non-homogeneous Poisson process), 'burst' releases
+        ``burst_size`` at once.
+        """
+        if mode not in ARRIVAL_MODES:
+            raise ValueError(f"Unknown arrival mode {mode!r}, pilih salah satu dari {ARRIVAL_MODES}")
+        rng = np.random.default_rng(seed)
+        step = max(1, int(burst_size)) if mode == 'burst' else 1
+        n = 0.0
+        while n < self.total:
+            yield self.time_at(n), min(step, math.ceil(self.total - n))
+            n += rng.exponential(1.0) if mode == 'poisson' else step
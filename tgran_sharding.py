@@ -0,0 +1,104 @@
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from tgran_sampling import spawn_seeds
+
+def shard_source_ips(source_ips, num_workers):
+    """
+    Divides source IPs among workers and returns ``(shards, weights)``.
+
+    With at least as many IPs as workers every worker owns a disjoint slice; otherwise
+    workers share IPs round-robin. Each weight is the fraction of the global load a
+    worker must carry so every source IP still sees an equal share.
+    """
+    if num_workers <= len(source_ips):
+        shards = [source_ips[w::num_workers] for w in range(num_workers)]
+    else:
+        shards = [[source_ips[w % len(source_ips)]] for w in range(num_workers)]
+    users = Counter(ip for shard in shards for ip in shard)
+    weights = [sum(1 / users[ip] for ip in shard) / len(source_ips) for shard in shards]
+    return shards, weights
+
+def split_requests(num_requests, weights):
+    """Splits ``num_requests`` proportionally to ``weights`` (largest remainder)."""
+    exact = np.asarray(weights) * num_requests
+    counts = np.floor(exact).astype(int)
+    for i in np.argsort(counts - exact)[:num_requests - counts.sum()]:
+        counts[i] += 1
+    return counts.tolist()
+
+def merge_results(parts):
+    # List baris log digabung apa adanya, TrafficStats digabung histogramnya
+    merged = None
+    for part in parts:
+        if merged is None:
+            merged = part
+        elif hasattr(merged, 'merge'):
+            merged.merge(part)
+        else:
+            merged.extend(part)
+    return merged if merged is not None else []
+
+def _init_worker(traffic_fn, worker_globals):
+    # Log writer, metrics, dll. dikirim eksplisit (bukan warisan fork), jadi jalan di semua start method
+    module = sys.modules[traffic_fn.__module__]
+    for name, value in (worker_globals or {}).items():
+        setattr(module, name, value)
+
+def _run_shard(traffic_fn, start_at, args, kwargs):
+    # Semua worker mulai di waktu yang sama supaya rate gabungan tetap sesuai target
+    delay = start_at - time.time()
+    if delay > 0:
+        time.sleep(delay)
+    return traffic_fn(*args, **kwargs)
+
+def run_sharded(traffic_fn, urls, num_requests, requests_per_second, zipf_params, source_ips, num_workers=None,
+                seed=None, startup_delay=1.0, worker_globals=None, mp_context=None, **kwargs):
+    """
+    Splits one traffic run across worker processes.
+
+    Every worker draws from the full Zipf-Mandelbrot distribution with its own spawned
+    seed, so the combined stream is still i.i.d. Zipf over all URLs, and runs at its
+    share of the global RPS budget. Per-worker results (row lists or TrafficStats)
+    are merged into one.
+
+    :param traffic_fn: generate_traffic or generate_traffic_async of the calling script
+    :param urls: URL list, ordered by Zipf rank
+    :param num_requests: Total number of requests across all workers
+    :param requests_per_second: Global target rate
+    :param zipf_params: (q, s) tuple passed to every worker
+    :param source_ips: Source IPs to divide among the workers
+    :param num_workers: Number of processes (default: os.cpu_count())
+    :param seed: Optional global seed; each worker gets an independent child seed
+    :param startup_delay: Seconds allowed for workers to start before the common start time
+    :param worker_globals: ``{name: value}`` module globals of traffic_fn to set in every
+        worker, e.g. LOG_WRITER and METRICS; they are pickled (configuration only) and
+        rebuilt there, so workers do not depend on fork copying the parent's state
+    :param mp_context: multiprocessing context (default: the platform default start method)
+    :param kwargs: Extra keyword arguments for traffic_fn (arrival, burst_size, ...)
+    """
+    num_workers = num_workers or os.cpu_count()
+    shards, weights = shard_source_ips(source_ips, num_workers)
+    counts = split_requests(num_requests, weights)
+    seeds = spawn_seeds(seed, num_workers)
+
+    start_at = time.time() + startup_delay
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=mp_context, initializer=_init_worker,
+                             initargs=(traffic_fn, worker_globals)) as pool:
+        futures = []
+        for w in range(num_workers):
+            if counts[w] == 0:
+                continue
+            args = (urls, counts[w], requests_per_second * weights[w], zipf_params, shards[w])
+            # Offset kecil per worker supaya pola constant saling menyisip, bukan bertumpuk
+            offset = w / requests_per_second
+            futures.append(pool.submit(_run_shard, traffic_fn, start_at + offset, args, dict(kwargs, seed=seeds[w])))
+        results = merge_results(f.result() for f in futures)
+
+    elapsed = time.time() - start_at
+    print(f"\n🧩 {len(futures)} worker selesai: {len(results)} request dalam {elapsed:.2f} s "
+          f"({len(results) / elapsed if elapsed > 0 else 0:.2f} RPS gabungan)")
+    return results
@@ -0,0 +1,241 @@
+import math
+import threading
+import numpy as np
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+class LatencyHistogram:
+    """
+    Log-bucketed (HDR-style) histogram with a bounded relative error.
+
+    Values are counted in buckets whose width grows with the value, so memory depends
+    only on the value range (a few thousand buckets for 1 us .. 1 h at 1%), never on
+    how many values were recorded. Histograms with the same settings can be merged.
+
+    :param precision: Relative bucket width, e.g. 0.01 for 1%
+    :param lowest: Smallest distinguishable value; everything below lands in bucket 0
+    """
+
+    def __init__(self, precision=0.01, lowest=0.001):
+        self.precision = precision
+        self.lowest = lowest
+        self._log_base = math.log1p(precision)
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _index(self, value):
+        if value <= self.lowest:
+            return 0
+        return int(math.log(value / self.lowest) / self._log_base) + 1
+
+    def _value(self, index):
+        if index == 0:
+            return self.lowest
+        # Titik tengah bucket (geometris)
+        return self.lowest * (1 + self.precision) ** (index - 0.5)
+
+    def record(self, value, count=1):
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def indexes(self, values):
+        """Bucket index of every value of a float array (vectorized _index)."""
+        index = np.floor(np.log(np.maximum(values, self.lowest) / self.lowest) / self._log_base).astype(np.int64) + 1
+        index[values <= self.lowest] = 0
+        return index
+
+    def add_buckets(self, indexes, counts, total, minimum, maximum):
+        """Adds pre-bucketed counts (see indexes()) with their sum, min and max."""
+        for i, count in zip(indexes, counts):
+            self.counts[i] = self.counts.get(i, 0) + count
+        self.count += sum(counts)
+        self.total += total
+        self.min = min(self.min, minimum)
+        self.max = max(self.max, maximum)
+
+    def record_many(self, values):
+        """Records an array of values in one vectorized pass (NaN values are skipped)."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        counts = np.bincount(self.indexes(values))
+        indexes = np.flatnonzero(counts)
+        self.add_buckets(indexes.tolist(), counts[indexes].tolist(), float(values.sum()), float(values.min()),
+                         float(values.max()))
+
+    def merge(self, other):
+        if (other.precision, other.lowest) != (self.precision, self.lowest):
+            raise ValueError("Histogram dengan precision/lowest berbeda tidak bisa digabung")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(max(self._value(index), self.min), self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self):
+        result = {'count': self.count, 'mean': self.mean()}
+        for q in PERCENTILES:
+            result[f'p{q:g}'] = self.percentile(q)
+        result['max'] = self.max
+        return result
+
+class TrafficStats:
+    """
+    Streaming replacement for the ``results`` list of generate_traffic.
+
+    It accepts the same log rows through ``append`` and folds them into histograms
+    (overall, per URL and per source IP) plus exact sums for the Total/Average rows,
+    so memory stays constant over any run length. Rows are located by the names in
+    ``columns`` (the script's LOG_COLUMNS); metrics whose column is missing are skipped.
+
+    Only the first ``max_urls`` distinct URLs get their own group, so catalogs with
+    millions of URLs do not grow memory without bound. Under Zipf the popular URLs
+    show up first, so these are in practice the top URLs; later ones share the
+    OTHER_URLS group.
+    """
+
+    OTHER_URLS = "(URL lainnya)"
+
+    METRICS = (('rtt', 'RTT (ms)'), ('size', 'Total Size (KB)'), ('throughput', 'Throughput (KB/s)'),
+               ('ttfb', 'TTFB (ms)'), ('html_done', 'HTML Done (ms)'), ('assets_done', 'Assets Done (ms)'),
+               ('dns', 'DNS (ms)'), ('connect', 'Connect (ms)'), ('tls', 'TLS (ms)'), ('wait', 'Wait (ms)'),
+               ('transfer', 'Transfer (ms)'))
+
+    def __init__(self, columns, max_urls=1000):
+        self.columns = list(columns)
+        self.max_urls = max_urls
+        self._url_col = self.columns.index('URL')
+        self._status_col = self.columns.index('Status Code')
+        self._source_col = self.columns.index('Source IP') if 'Source IP' in self.columns else None
+        self._metric_cols = [(name, self.columns.index(col)) for name, col in self.METRICS if col in self.columns]
+        self._reused_col = self.columns.index('Reused') if 'Reused' in self.columns else None
+
+        self._lock = threading.Lock()
+        self.count = 0
+        self.errors = 0
+        self.reused = 0
+        self.sums = {name: 0.0 for name, _ in self._metric_cols}
+        self.overall = self._new_group()
+        self.per_url = {}
+        self.per_source = {}
+
+    def _new_group(self):
+        return {name: LatencyHistogram() for name, _ in self._metric_cols}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def append(self, row):
+        status = row[self._status_col]
+        ok = isinstance(status, int) and status < 400
+        values = [(name, row[col]) for name, col in self._metric_cols]
+        url = row[self._url_col]
+        source = row[self._source_col] if self._source_col is not None else ''
+        reused = self._reused_col is not None and row[self._reused_col] is True
+
+        with self._lock:
+            self.count += 1
+            if not ok:
+                self.errors += 1
+            if reused:
+                self.reused += 1
+            url_group = self._url_group(url)
+            source_group = self.per_source.get(source)
+            if source_group is None:
+                source_group = self.per_source[source] = self._new_group()
+
+            for name, value in values:
+                # NaN = fase tidak terjadi (mis. DNS/connect pada koneksi reuse)
+                if not isinstance(value, (int, float)) or value != value:
+                    continue
+                self.sums[name] += value
+                # RTT request gagal tetap dihitung (sama dengan Total/Average), size/throughput tidak
+                if name != 'rtt' and not ok:
+                    continue
+                self.overall[name].record(value)
+                url_group[name].record(value)
+                source_group[name].record(value)
+
+    def _url_group(self, url):
+        group = self.per_url.get(url)
+        if group is None:
+            if len(self.per_url) >= self.max_urls and url != self.OTHER_URLS:
+                url = self.OTHER_URLS
+                group = self.per_url.get(url)
+            if group is None:
+                group = self.per_url[url] = self._new_group()
+        return group
+
+    def merge(self, other):
+        with self._lock:
+            self.count += other.count
+            self.errors += other.errors
+            self.reused += other.reused
+            for name in self.sums:
+                self.sums[name] += other.sums[name]
+                self.overall[name].merge(other.overall[name])
+            for key, group in other.per_url.items():
+                target = self._url_group(key)
+                for name in target:
+                    target[name].merge(group[name])
+            for key, group in other.per_source.items():
+                target = self.per_source.setdefault(key, self._new_group())
+                for name in target:
+                    target[name].merge(group[name])
+        return self
+
+    def totals(self):
+        """Returns ``(count, sums)`` with the exact per-metric sums over every row."""
+        return self.count, dict(self.sums)
+
+    def print_report(self, top=10):
+        print(f"\n===== Distribusi ({self.count} request, {self.errors} gagal) =====")
+        print("Metric\tCount\tp50\tp90\tp99\tp99.9\tMax")
+        for name, hist in self.overall.items():
+            s = hist.summary()
+            print(f"{name}\t{s['count']}\t{s['p50']:.2f}\t{s['p90']:.2f}\t{s['p99']:.2f}\t{s['p99.9']:.2f}\t{s['max']:.2f}")
+        if self._reused_col is not None:
+            print(f"Koneksi reuse: {self.reused}/{self.count} request")
+
+        for title, groups in (("Source IP", self.per_source), ("URL", self.per_url)):
+            print(f"\n--- RTT (ms) per {title} ---")
+            print(f"{title}\tCount\tp50\tp90\tp99\tp99.9\tMax")
+            ranked = sorted(groups.items(), key=lambda kv: kv[1]['rtt'].count, reverse=True)
+            for key, group in ranked[:top]:
+                s = group['rtt'].summary()
+                print(f"{key}\t{s['count']}\t{s['p50']:.2f}\t{s['p90']:.2f}\t{s['p99']:.2f}\t{s['p99.9']:.2f}\t{s['max']:.2f}")
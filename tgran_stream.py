@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+import requests
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError, SSLError
+
+class BodyReader:
+    """
+    Reads response bodies into a reusable buffer and throws the data away, counting bytes.
+
+    Replaces ``len(response.content)`` when only the size of a body matters: memory per
+    request stays at ``chunk_size`` however large the object is. Each thread gets its
+    own buffer. With ``max_rate`` the body is read no faster than that many bytes per
+    second (like a video player or a throttled download client), which lets TCP flow
+    control slow the server down instead of buffering on our side.
+
+    :param chunk_size: Bytes read per call
+    :param max_rate: Read rate cap in bytes/s (None = as fast as possible)
+    """
+
+    def __init__(self, chunk_size=64 * 1024, max_rate=None):
+        self.chunk_size = chunk_size
+        self.max_rate = max_rate
+        self._local = threading.local()
+
+    def __getstate__(self):
+        return {'chunk_size': self.chunk_size, 'max_rate': self.max_rate}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _buffer(self):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = self._local.buffer = bytearray(self.chunk_size)
+        return buffer
+
+    def _pace(self, start, total):
+        # Tidur sampai jumlah byte yang sudah dibaca sesuai dengan kecepatan target
+        wait = start + total / self.max_rate - time.perf_counter()
+        return wait if wait > 0 else 0
+
+    @staticmethod
+    def _readinto(raw, buffer):
+        # Sama seperti iter_content: error urllib3 dibungkus jadi exception requests
+        try:
+            return raw.readinto(buffer)
+        except ProtocolError as e:
+            raise requests.exceptions.ChunkedEncodingError(e)
+        except DecodeError as e:
+            raise requests.exceptions.ContentDecodingError(e)
+        except ReadTimeoutError as e:
+            raise requests.exceptions.ConnectionError(e)
+        except SSLError as e:
+            raise requests.exceptions.SSLError(e)
+
+    def consume(self, response):
+        """Reads the rest of a ``stream=True`` requests response and returns its decoded size."""
+        raw = response.raw
+        raw.decode_content = True  # ukuran sama dengan len(response.content)
+        buffer = self._buffer()
+        total = 0
+        start = time.perf_counter()
+        try:
+            while True:
+                n = self._readinto(raw, buffer)
+                if not n:
+                    break
+                total += n
+                if self.max_rate:
+                    wait = self._pace(start, total)
+                    if wait:
+                        time.sleep(wait)
+        finally:
+            response.close()
+        return total
+
+    async def consume_async(self, response):
+        """Same as consume() for an aiohttp response."""
+        total = 0
+        start = time.perf_counter()
+        async for chunk in response.content.iter_chunked(self.chunk_size):
+            total += len(chunk)
+            if self.max_rate:
+                wait = self._pace(start, total)
+                if wait:
+                    await asyncio.sleep(wait)
+        return total
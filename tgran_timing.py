@@ -0,0 +1,164 @@
+import math
+import socket
+import threading
+import time
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.connection import allowed_gai_family
+
+PHASE_COLUMNS = ["DNS (ms)", "Connect (ms)", "TLS (ms)", "Wait (ms)", "Transfer (ms)", "Reused"]
+
+_local = threading.local()
+
+class RequestPhases:
+    """
+    Phase timestamps of one request, all on the time.perf_counter() clock.
+
+    ``dns``/``connect``/``tls`` are durations in ms and stay NaN when the phase did
+    not happen (connection reused from the pool, or no TLS). ``wait`` runs from the
+    first byte of the request to the response headers (server time + one RTT, the
+    "Waiting (TTFB)" of browser dev tools), ``transfer`` from the headers to the end
+    of the body.
+    """
+
+    __slots__ = ('dns', 'connect', 'tls', 'reused', 'sent', 'headers', 'done')
+
+    def __init__(self):
+        self.dns = self.connect = self.tls = math.nan
+        self.reused = True
+        self.sent = self.headers = self.done = None
+
+    def finish(self):
+        """Marks the body as fully read and returns the row values."""
+        self.done = time.perf_counter()
+        return self.row()
+
+    def row(self):
+        """Values in PHASE_COLUMNS order, rounded like the other log columns."""
+        wait = (self.headers - self.sent) * 1000 if self.sent is not None and self.headers is not None else math.nan
+        transfer = (self.done - self.headers) * 1000 if self.headers is not None and self.done is not None else math.nan
+        return [round(self.dns, 2), round(self.connect, 2), round(self.tls, 2), round(wait, 2), round(transfer, 2),
+                self.reused]
+
+def begin_phases():
+    """Starts recording the phases of the next request made on this thread."""
+    phases = _local.phases = RequestPhases()
+    return phases
+
+def finish_phases():
+    """Marks the body as fully read and stops recording; returns the row values."""
+    phases = getattr(_local, 'phases', None)
+    _local.phases = None
+    if phases is None:
+        return RequestPhases().row()
+    return phases.finish()
+
+class TimedHTTPConnection(HTTPConnection):
+    """urllib3 connection that reports DNS, connect, request and header times to begin_phases()."""
+
+    def _new_conn(self):
+        phases = getattr(_local, 'phases', None)
+        if phases is None:
+            return super()._new_conn()
+        host = self._dns_host
+        if self.source_address:
+            family = socket.AF_INET6 if ':' in self.source_address[0] else socket.AF_INET
+        else:
+            family = allowed_gai_family()
+        start = time.perf_counter()
+        try:
+            address = socket.getaddrinfo(host, self.port, family, socket.SOCK_STREAM)[0][4][0]
+        except socket.gaierror:
+            return super()._new_conn()  # biar urllib3 yang membuat NameResolutionError
+        resolved = time.perf_counter()
+        # create_connection dengan IP yang sudah di-resolve, jadi waktu DNS dan connect terpisah
+        self._dns_host = address
+        try:
+            sock = super()._new_conn()
+        finally:
+            self._dns_host = host
+        phases.dns = (resolved - start) * 1000
+        phases.connect = (time.perf_counter() - resolved) * 1000
+        phases.reused = False
+        return sock
+
+    def request(self, *args, **kwargs):
+        phases = getattr(_local, 'phases', None)
+        if phases is not None:
+            # HTTP biasa baru connect di dalam request(); connect dulu supaya Wait tidak ikut DNS/connect
+            if self.sock is None:
+                self.connect()
+            phases.sent = time.perf_counter()
+        return super().request(*args, **kwargs)
+
+    def getresponse(self, *args, **kwargs):
+        response = super().getresponse(*args, **kwargs)
+        phases = getattr(_local, 'phases', None)
+        if phases is not None:
+            phases.headers = time.perf_counter()
+        return response
+
+class TimedHTTPSConnection(TimedHTTPConnection, HTTPSConnection):
+    def connect(self):
+        phases = getattr(_local, 'phases', None)
+        start = time.perf_counter()
+        super().connect()
+        if phases is not None and not math.isnan(phases.connect):
+            phases.tls = (time.perf_counter() - start) * 1000 - phases.dns - phases.connect
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+# Untuk PoolManager.pool_classes_by_scheme (lihat SourceIPAdapter.init_poolmanager)
+TIMED_POOL_CLASSES = {'http': TimedHTTPConnectionPool, 'https': TimedHTTPSConnectionPool}
+
+def aiohttp_trace_config():
+    """
+    TraceConfig filling a RequestPhases passed as ``trace_request_ctx`` to session.get().
+
+    aiohttp does not separate the TLS handshake from connection setup, so for the
+    async engine ``connect`` includes TLS and ``tls`` stays NaN.
+    """
+    import aiohttp
+
+    def handler(fn):
+        async def callback(session, context, params):
+            if isinstance(context.trace_request_ctx, RequestPhases):
+                fn(context.trace_request_ctx, context)
+        return callback
+
+    def dns_start(phases, context):
+        context.dns_start = time.perf_counter()
+
+    def dns_end(phases, context):
+        phases.dns = (time.perf_counter() - context.dns_start) * 1000
+
+    def dns_cache_hit(phases, context):
+        phases.dns = 0.0
+
+    def create_start(phases, context):
+        context.create_start = time.perf_counter()
+
+    def create_end(phases, context):
+        elapsed = (time.perf_counter() - context.create_start) * 1000
+        phases.connect = elapsed - (0.0 if math.isnan(phases.dns) else phases.dns)
+        phases.reused = False
+
+    def headers_sent(phases, context):
+        phases.sent = time.perf_counter()
+
+    def request_end(phases, context):
+        phases.headers = time.perf_counter()
+
+    trace = aiohttp.TraceConfig()
+    trace.on_dns_resolvehost_start.append(handler(dns_start))
+    trace.on_dns_resolvehost_end.append(handler(dns_end))
+    trace.on_dns_cache_hit.append(handler(dns_cache_hit))
+    trace.on_connection_create_start.append(handler(create_start))
+    trace.on_connection_create_end.append(handler(create_end))
+    trace.on_request_headers_sent.append(handler(headers_sent))
+    trace.on_request_end.append(handler(request_end))
+    return trace
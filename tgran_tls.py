@@ -0,0 +1,86 @@
+import os
+import ssl
+import threading
+import requests
+import urllib3
+
+class _ResumingSSLSocket(ssl.SSLSocket):
+    # TLS 1.3 mengirim session ticket setelah handshake, jadi session baru bisa disimpan
+    # setelah data pertama dibaca dari socket
+    _pending_key = None
+
+    def recv_into(self, buffer, nbytes=None, flags=0):
+        n = super().recv_into(buffer, nbytes, flags)
+        if self._pending_key is not None:
+            self.context._save_session(self._pending_key, self)
+            self._pending_key = None
+        return n
+
+class ResumingSSLContext(ssl.SSLContext):
+    """
+    Client SSLContext that resumes TLS sessions on reconnect.
+
+    urllib3 calls wrap_socket() for every new connection; this context passes the
+    last session seen for the same (server name, port) so the server can resume it
+    with a ticket instead of doing a full handshake. Use one context per source IP,
+    like a UE keeps its own session cache. With ``resume=False`` every connection
+    does a full handshake, to measure handshake cost.
+
+    :param resume: Offer cached sessions on reconnect
+    :param verify: True (CA bundle of requests), False (no verification) or a CA file/dir path
+    """
+
+    def __new__(cls, resume=True, verify=True):
+        return super().__new__(cls, ssl.PROTOCOL_TLS_CLIENT)
+
+    def __init__(self, resume=True, verify=True):
+        self.resume = resume
+        self.sslsocket_class = _ResumingSSLSocket
+        self.full_handshakes = 0
+        self.resumed = 0
+        self._sessions = {}
+        self._lock = threading.Lock()
+        if verify is False:
+            self.check_hostname = False
+            self.verify_mode = ssl.CERT_NONE
+            # Dimatikan dengan sengaja (mis. sertifikat self-signed), tidak perlu warning per request
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        else:
+            # CA dimuat sekali di sini, bukan per koneksi (lihat SourceIPAdapter.cert_verify)
+            location = requests.certs.where() if verify is True else verify
+            if os.path.isdir(location):
+                self.load_verify_locations(capath=location)
+            else:
+                self.load_verify_locations(cafile=location)
+
+    @property
+    def cert_reqs(self):
+        """urllib3 ``cert_reqs`` value matching this context's verify_mode."""
+        return 'CERT_NONE' if self.verify_mode == ssl.CERT_NONE else 'CERT_REQUIRED'
+
+    def wrap_socket(self, sock, *args, server_hostname=None, session=None, **kwargs):
+        key = (server_hostname, sock.getpeername()[1])
+        if session is None and self.resume:
+            with self._lock:
+                session = self._sessions.get(key)
+        ssock = super().wrap_socket(sock, *args, server_hostname=server_hostname, session=session, **kwargs)
+        with self._lock:
+            if ssock.session_reused:
+                self.resumed += 1
+            else:
+                self.full_handshakes += 1
+        if self.resume:
+            ssock._pending_key = key
+        return ssock
+
+    def _save_session(self, key, ssock):
+        session = ssock.session
+        if session is not None:
+            with self._lock:
+                self._sessions[key] = session
+
+def print_tls_report(contexts):
+    full = sum(ctx.full_handshakes for ctx in contexts)
+    resumed = sum(ctx.resumed for ctx in contexts)
+    if full or resumed:
+        print(f"🔐 TLS handshake: {full} penuh, {resumed} resumed ({resumed / (full + resumed) * 100:.1f}% resumed)")